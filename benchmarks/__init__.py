@@ -0,0 +1 @@
+"""Benchmarks of the homework bot pipeline."""
@@ -0,0 +1,123 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import requests
+
+from homework_bot import decoding
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def make_body(homeworks: int) -> bytes:
+    """API answer with `homeworks` items, as the server sends it."""
+    return json.dumps({
+        'homeworks': [
+            {
+                'id': number,
+                'status': STATUSES[number % len(STATUSES)],
+                'homework_name': f'student__hw{number:06d}.zip',
+                'reviewer_comment': 'Всё хорошо, но можно лучше.',
+                'date_updated': '2022-01-01T10:00:00Z',
+                'lesson_name': f'Урок {number}',
+            }
+            for number in range(homeworks)
+        ],
+        'current_date': 1640995200,
+    }, ensure_ascii=False).encode()
+
+
+def decode_requests(body: bytes, chunk_size: int) -> int:
+    """Current path: `response.json()` of requests."""
+    response = requests.Response()
+    response._content = body
+    response.encoding = 'utf-8'
+    return sum(1 for _ in response.json()['homeworks'])
+
+
+def decode_fast(body: bytes, chunk_size: int) -> int:
+    """Whole body through `decoding.loads`."""
+    return sum(1 for _ in decoding.loads(body)['homeworks'])
+
+
+def decode_stream(body: bytes, chunk_size: int) -> int:
+    """Homeworks one by one from chunks of the body."""
+    chunks = (
+        body[start:start + chunk_size]
+        for start in range(0, len(body), chunk_size)
+    )
+    return sum(1 for _ in decoding.HomeworkStream(chunks))
+
+
+MODES = {
+    'requests_json': decode_requests,
+    'loads': decode_fast,
+    'stream': decode_stream,
+}
+
+
+def measure(decode, body: bytes, chunk_size: int, repeats: int) -> dict:
+    """Best time of the repeats and peak memory of one more run."""
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        decode(body, chunk_size)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        decode(body, chunk_size)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(times), 'peak_kb': peak // 1024}
+
+
+def run_benchmark(homeworks: int = 100000, repeats: int = 3,
+                  chunk_size: int = decoding.STREAM_CHUNK_SIZE) -> dict:
+    """Decodes one answer with every mode and compares them."""
+    body = make_body(homeworks)
+    results = {
+        mode: measure(decode, body, chunk_size, repeats)
+        for mode, decode in MODES.items()
+    }
+    return {
+        'config': {
+            'homeworks': homeworks,
+            'repeats': repeats,
+            'chunk_size': chunk_size,
+            'body_kb': len(body) // 1024,
+            'backend': decoding.backend(),
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'modes': results,
+    }
+
+
+def main() -> None:
+    """Runs the benchmark with options from argv."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.decoding',
+        description='Time and peak memory of decoding a large API answer.'
+    )
+    parser.add_argument('--homeworks', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument(
+        '--chunk-size', type=int, default=decoding.STREAM_CHUNK_SIZE
+    )
+    parser.add_argument('--output', default='decoding_results.json')
+    args = parser.parse_args()
+    results = run_benchmark(args.homeworks, args.repeats, args.chunk_size)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    json.dump(results['modes'], sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
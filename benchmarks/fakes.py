@@ -0,0 +1,163 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeServer(ThreadingHTTPServer):
+    """Local HTTP stand-in with configurable latency and error rate."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, handler_class, latency: float = 0,
+                 error_rate: float = 0) -> None:
+        """Binds to a free local port, call `start` to serve."""
+        super().__init__(('127.0.0.1', 0), handler_class)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the server."""
+        host, port = self.server_address
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeServer':
+        """Serves requests in a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops serving and closes the socket."""
+        self.shutdown()
+        self.server_close()
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Counts requests, adds latency and injects errors."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def handle_request(self) -> None:
+        """Answers the request with `respond` or an injected error."""
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+            if server.error_rate and random.random() < server.error_rate:
+                with server.lock:
+                    server.errors += 1
+                self.send_json(500, {
+                    'ok': False, 'error_code': 500,
+                    'description': 'Internal Server Error'
+                })
+                return
+            self.respond()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def respond(self) -> None:
+        """Sends the successful answer."""
+        raise NotImplementedError
+
+    def send_json(self, status: int, data) -> None:
+        """Sends JSON body with the status code."""
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        """Keeps benchmark output clean."""
+
+
+class PracticumHandler(FakeHandler):
+    """Answers like the homework statuses endpoint.
+    Every token has one approved homework named after the token.
+    """
+
+    def do_GET(self) -> None:
+        """Handles the homework statuses request."""
+        self.handle_request()
+
+    def respond(self) -> None:
+        """Sends homeworks of the token from the Authorization header."""
+        token = self.headers['Authorization'].split(' ', 1)[1]
+        self.send_json(200, {
+            'homeworks': [{
+                'id': 1,
+                'homework_name': f'{token}.zip',
+                'status': 'approved'
+            }],
+            'current_date': self.server.current_date
+        })
+
+
+class FakePracticumServer(FakeServer):
+    """Local stand-in of the Practicum API."""
+
+    PATH = '/api/user_api/homework_statuses/'
+
+    def __init__(self, latency: float = 0, error_rate: float = 0) -> None:
+        """Answers with the current time as `current_date`."""
+        super().__init__(PracticumHandler, latency, error_rate)
+        self.current_date = int(time.time())
+
+    @property
+    def url(self) -> str:
+        """URL to use instead of `homework.ENDPOINT`."""
+        return f'{self.base_url}{self.PATH}'
+
+
+class TelegramHandler(FakeHandler):
+    """Answers like the Bot API sendMessage method."""
+
+    def do_POST(self) -> None:
+        """Handles the Bot API call."""
+        self.handle_request()
+
+    def respond(self) -> None:
+        """Echoes the sent message back."""
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        with self.server.lock:
+            self.server.messages += 1
+            message_id = self.server.messages
+        self.send_json(200, {'ok': True, 'result': {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+class FakeTelegramServer(FakeServer):
+    """Local stand-in of the Telegram Bot API."""
+
+    def __init__(self, latency: float = 0, error_rate: float = 0) -> None:
+        """Counts messages it received."""
+        super().__init__(TelegramHandler, latency, error_rate)
+        self.messages = 0
+
+    @property
+    def bot_url(self) -> str:
+        """`base_url` argument of `telegram.Bot`."""
+        return f'{self.base_url}/bot'
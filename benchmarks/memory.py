@@ -0,0 +1,82 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import tracemalloc
+
+import homework
+from benchmarks.decoding import make_body
+from homework_bot import decoding
+
+
+def keep_dicts(body: bytes):
+    """Old state: API dicts plus rendered messages for every homework."""
+    homeworks = json.loads(body)['homeworks']
+    messages = [homework.parse_status(item) for item in homeworks]
+    return homeworks, messages
+
+
+def keep_records(body: bytes):
+    """Compact state: Homework records, messages are not kept."""
+    return homework.validate_answer(decoding.loads(body)).homeworks
+
+
+MODES = {
+    'dicts': keep_dicts,
+    'records': keep_records,
+}
+
+
+def retained(build, body: bytes) -> int:
+    """Bytes still allocated by `build` once its temporaries are freed."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build(body)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def run_benchmark(homeworks: int = 1000000) -> dict:
+    """Memory retained per tracked homework by every representation."""
+    body = make_body(homeworks)
+    modes = {}
+    for mode, build in MODES.items():
+        size = retained(build, body)
+        modes[mode] = {
+            'total_kb': size // 1024,
+            'bytes_per_homework': size / homeworks if homeworks else 0.0,
+        }
+    return {
+        'config': {'homeworks': homeworks},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'modes': modes,
+    }
+
+
+def main() -> None:
+    """Runs the benchmark with options from argv."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.memory',
+        description='Memory kept for tracked homeworks.'
+    )
+    parser.add_argument('--homeworks', type=int, default=1000000)
+    parser.add_argument('--output', default='memory_results.json')
+    args = parser.parse_args()
+    results = run_benchmark(args.homeworks)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    json.dump(results['modes'], sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
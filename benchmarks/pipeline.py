@@ -0,0 +1,181 @@
+import argparse
+import json
+import logging
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import telegram
+from telegram.utils.request import Request
+
+import homework
+from benchmarks.fakes import FakePracticumServer, FakeTelegramServer
+from homework_bot.diff import render_batch
+
+STAGES = ('fetch', 'check', 'parse', 'send')
+
+
+def percentile(values: list, share: float) -> float:
+    """Nearest-rank percentile of the values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(share * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def stage_mean(results: list, stage: str) -> float:
+    """Mean time of the stage over polls that reached it."""
+    timings = [result[stage] for result in results if stage in result]
+    return statistics.mean(timings) if timings else None
+
+
+def run_tenant(bot: telegram.Bot, token: str, chat_id: int,
+               endpoint: str) -> dict:
+    """Runs the pipeline once for the tenant and times every stage."""
+    timings = {}
+    started = time.perf_counter()
+    try:
+        response = homework.request_homeworks(token, 0, endpoint)
+        timings['fetch'] = time.perf_counter() - started
+        mark = time.perf_counter()
+        homeworks = homework.check_response(response)
+        timings['check'] = time.perf_counter() - mark
+        mark = time.perf_counter()
+        messages = [homework.parse_status(item) for item in homeworks]
+        timings['parse'] = time.perf_counter() - mark
+        mark = time.perf_counter()
+        for message in render_batch(messages):
+            homework.deliver_message(bot, chat_id, message)
+        timings['send'] = time.perf_counter() - mark
+        failed = False
+    except Exception:
+        failed = True
+    timings['total'] = time.perf_counter() - started
+    timings['failed'] = failed
+    return timings
+
+
+def run_benchmark(tenants: int = 1000, cycles: int = 3,
+                  concurrency: int = 50, api_latency: float = 0,
+                  api_error_rate: float = 0, telegram_latency: float = 0,
+                  telegram_error_rate: float = 0,
+                  trace_memory: bool = False) -> dict:
+    """Drives the pipeline for `tenants` against local fake servers."""
+    practicum = FakePracticumServer(api_latency, api_error_rate).start()
+    telegram_api = FakeTelegramServer(
+        telegram_latency, telegram_error_rate
+    ).start()
+    bot = telegram.Bot(
+        token='1234:benchmark', base_url=telegram_api.bot_url,
+        request=Request(con_pool_size=concurrency)
+    )
+    if trace_memory:
+        tracemalloc.start()
+    results = []
+    cycle_durations = []
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(cycles):
+                started = time.perf_counter()
+                results.extend(executor.map(
+                    lambda number: run_tenant(
+                        bot, f'token{number}', number, practicum.url
+                    ),
+                    range(tenants)
+                ))
+                cycle_durations.append(time.perf_counter() - started)
+        memory_peak = None
+        if trace_memory:
+            memory_peak = tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        practicum.stop()
+        telegram_api.stop()
+    totals = [result['total'] for result in results]
+    wall_time = sum(cycle_durations)
+    return {
+        'config': {
+            'tenants': tenants,
+            'cycles': cycles,
+            'concurrency': concurrency,
+            'api_latency': api_latency,
+            'api_error_rate': api_error_rate,
+            'telegram_latency': telegram_latency,
+            'telegram_error_rate': telegram_error_rate,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'polls': len(results),
+        'failed': sum(result['failed'] for result in results),
+        'wall_time': wall_time,
+        'throughput': len(results) / wall_time if wall_time else 0.0,
+        'cycle_duration': {
+            'mean': statistics.mean(cycle_durations),
+            'max': max(cycle_durations),
+        },
+        'latency': {
+            'p50': percentile(totals, 0.5),
+            'p99': percentile(totals, 0.99),
+            'max': max(totals),
+        },
+        'stages': {stage: stage_mean(results, stage) for stage in STAGES},
+        'memory': {
+            'max_rss_kb': resource.getrusage(
+                resource.RUSAGE_SELF
+            ).ru_maxrss,
+            'tracemalloc_peak_kb': memory_peak,
+        },
+        'servers': {
+            'practicum_requests': practicum.requests,
+            'practicum_errors': practicum.errors,
+            'telegram_messages': telegram_api.messages,
+            'telegram_errors': telegram_api.errors,
+        },
+    }
+
+
+def main() -> None:
+    """Runs the benchmark with options from argv."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.pipeline',
+        description='Throughput of get_api_answer -> check_response -> '
+                    'parse_status -> send_message against local fakes.'
+    )
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--api-latency', type=float, default=0)
+    parser.add_argument('--api-error-rate', type=float, default=0)
+    parser.add_argument('--telegram-latency', type=float, default=0)
+    parser.add_argument('--telegram-error-rate', type=float, default=0)
+    parser.add_argument('--trace-memory', action='store_true')
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+    results = run_benchmark(
+        tenants=args.tenants, cycles=args.cycles,
+        concurrency=args.concurrency, api_latency=args.api_latency,
+        api_error_rate=args.api_error_rate,
+        telegram_latency=args.telegram_latency,
+        telegram_error_rate=args.telegram_error_rate,
+        trace_memory=args.trace_memory
+    )
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    json.dump(
+        {key: results[key] for key in ('polls', 'throughput', 'latency')},
+        sys.stdout, indent=2
+    )
+    print()
+
+
+if __name__ == '__main__':
+    main()
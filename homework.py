@@ -1,36 +1,21 @@
 import logging
 import os
-import sys
 import time
 from http import HTTPStatus
 from json.decoder import JSONDecodeError
-from logging import StreamHandler
+from typing import TYPE_CHECKING
 
-import requests
-import telegram
-from dotenv import load_dotenv
+from homework_bot import metrics
 
-load_dotenv()
+if TYPE_CHECKING:
+    import requests
+    import telegram
 
-logging.basicConfig(
-    filename='runtime_log.log',
-    filemode='a',
-    level=logging.INFO,
-    format='%(asctime)s; %(levelname)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+    from homework_bot.decoding import HomeworkStream
+    from homework_bot.models import Answer, Homework
+    from homework_bot.tenants import Tenant, TenantState
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-
-handler = StreamHandler(stream=sys.stdout)
-formatter = logging.Formatter(
-    '%(asctime)s; %(levelname)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-
-handler.setFormatter(formatter)
-logger.addHandler(handler)
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
@@ -41,7 +26,6 @@ RETRY_TIME = 60 * 10
 RETRY_TIME_AFTER_ERROR = 60
 
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
 
 HOMEWORK_STATUSES = {
@@ -51,41 +35,127 @@ HOMEWORK_STATUSES = {
 }
 
 
-def send_message(bot: telegram.Bot, message: str) -> None:
-    """Bot message sender."""
+def init() -> None:
+    """Loads settings from .env and sets up logging.
+    Importing the module has no side effects, entry points call this.
+    """
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN', PRACTICUM_TOKEN)
+    TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN', TELEGRAM_TOKEN)
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID)
+
+    from homework_bot.logs import setup_logging
+
+    setup_logging()
+
+
+def deliver_message(bot: 'telegram.Bot', chat_id: str, message: str) -> None:
+    """Sends message to the given chat."""
+    import telegram
+
+    from homework_bot.deadlines import TELEGRAM_TIMEOUT
+
     try:
         bot.send_message(
-            chat_id=TELEGRAM_CHAT_ID,
-            text=message
+            chat_id=chat_id,
+            text=message,
+            timeout=TELEGRAM_TIMEOUT
         )
         info_message = 'Message is sent successfully!'
         logger.info(info_message)
-    except telegram.TelegramError:
+    except telegram.TelegramError as error:
+        if isinstance(error, telegram.error.TimedOut):
+            metrics.TIMEOUTS.inc(target='telegram')
         error_message = 'Message cannot be sent.'
         logger.error(error_message)
 
 
-def get_api_answer(current_timestamp: int) -> dict:
-    """Checks api answer and get needed data after."""
-    timestamp = current_timestamp
-    params = {'from_date': timestamp}
+def send_message(bot: 'telegram.Bot', message: str) -> None:
+    """Bot message sender."""
+    deliver_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def fetch_homeworks(token: str, from_date: int, endpoint: str = ENDPOINT,
+                    headers: dict = None,
+                    stream: bool = False) -> 'requests.Response':
+    """Requests homework statuses on behalf of the token owner.
+    The answer is returned as is, without decoding. With `stream`
+    the body is not read until the caller reads it. Requests go
+    through the circuit breaker of the endpoint, shared by all
+    tenants: while it is open CircuitOpenError is raised at once.
+    """
+    from homework_bot.breaker import breaker_for
+
+    return breaker_for(endpoint).call(
+        call_api, token, from_date, endpoint, headers, stream
+    )
+
+
+def call_api(token: str, from_date: int, endpoint: str = ENDPOINT,
+             headers: dict = None,
+             stream: bool = False) -> 'requests.Response':
+    """Makes the request of `fetch_homeworks` bypassing the breaker.
+    Connect and read timeouts are cut down to the deadline of the poll
+    cycle, slow requests are hedged if HEDGE_ENABLED is set.
+    """
+    import requests
+
+    from homework_bot import hedging, sessions
+
+    params = {'from_date': from_date}
+    headers = {'Authorization': f'OAuth {token}', **(headers or {})}
     try:
-        response = requests.get(
-            url=ENDPOINT,
-            headers=HEADERS,
-            params=params
+        with metrics.Timer() as timer:
+            response = hedging.hedger_for(endpoint).call(
+                lambda timeout: sessions.get(
+                    url=endpoint,
+                    headers=headers,
+                    params=params,
+                    stream=stream,
+                    timeout=timeout
+                )
+            )
+    except requests.exceptions.Timeout:
+        metrics.API_REQUEST_SECONDS.observe(timer.elapsed, status='timeout')
+        metrics.TIMEOUTS.inc(target='api')
+        error_message = (
+            f'Endpoint did not answer within {timer.elapsed:.1f} s.'
         )
+        logger.error(error_message)
+        raise TimeoutError(error_message)
     except requests.exceptions.ConnectionError:
+        metrics.API_REQUEST_SECONDS.observe(timer.elapsed, status='error')
         error_message = 'Endpoint is unreachable. Try another url.'
         logger.error(error_message)
         raise ConnectionError
+    metrics.API_REQUEST_SECONDS.observe(
+        timer.elapsed, status=response.status_code
+    )
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        return response
     if response.status_code != HTTPStatus.OK:
         logger.error(
             f'Cannot access to api. '
             f'Status code: {response.status_code}'
         )
         raise response.raise_for_status()
+    return response
+
+
+def decode_answer(response: 'requests.Response') -> dict:
+    """Transforms JSON body of the api answer to python dict.
+    Bodies of real responses go through the fastest installed decoder.
+    """
+    import requests
+
+    from homework_bot import decoding
+
     try:
+        if isinstance(response, requests.Response):
+            return decoding.loads(response.content)
         return response.json()
     except JSONDecodeError as error:
         logger.error(
@@ -94,6 +164,31 @@ def get_api_answer(current_timestamp: int) -> dict:
         raise JSONDecodeError
 
 
+def request_homeworks(token: str, from_date: int,
+                      endpoint: str = ENDPOINT) -> dict:
+    """Requests and decodes homework statuses of the token owner."""
+    return decode_answer(fetch_homeworks(token, from_date, endpoint))
+
+
+def stream_homeworks(token: str, from_date: int,
+                     endpoint: str = ENDPOINT) -> 'HomeworkStream':
+    """Yields homeworks one by one while the answer is downloaded.
+    Meant for long histories, e.g. backfills from `from_date=0`:
+    memory is bounded by one homework instead of the whole answer.
+    """
+    from homework_bot import decoding
+
+    return decoding.stream_homeworks(
+        fetch_homeworks(token, from_date, endpoint, stream=True)
+    )
+
+
+def get_api_answer(current_timestamp: int) -> dict:
+    """Checks api answer and get needed data after."""
+    return request_homeworks(PRACTICUM_TOKEN, current_timestamp)
+
+
+@metrics.count_failures('check_response')
 def check_response(response: dict) -> list:
     """Checks if api answer is correct."""
     if not isinstance(response, dict):
@@ -115,6 +210,7 @@ def check_response(response: dict) -> list:
     return lst_of_homeworks
 
 
+@metrics.count_failures('parse_status')
 def parse_status(homework: dict) -> str:
     """Checks that data after api answer is valid.
     And figures out the condition of 'status' parameter
@@ -144,6 +240,29 @@ def parse_status(homework: dict) -> str:
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
+@metrics.count_failures('validate_answer')
+def validate_answer(answer: dict, partial: bool = False) -> 'Answer':
+    """Checks the whole api answer in one pass.
+    Returns Homework records. Every problem found is logged and raised
+    at once as TypeError or KeyError, like the checks above raise.
+    With `partial` invalid homeworks are skipped and returned in
+    `Answer.errors` instead.
+    """
+    from homework_bot.models import ValidationError, compile_validator
+
+    try:
+        return compile_validator(tuple(HOMEWORK_STATUSES))(answer, partial)
+    except ValidationError as error:
+        logger.error(error.args[0])
+        raise
+
+
+def status_message(homework: 'Homework') -> str:
+    """Message about the status of the checked homework."""
+    verdict = HOMEWORK_STATUSES[homework.status]
+    return f'Изменился статус проверки работы "{homework.name}". {verdict}'
+
+
 def check_list_of_homeworks(homeworks: list) -> bool:
     """Function that inspects if list of homeworks empty or not."""
     if not isinstance(homeworks, list):
@@ -162,10 +281,133 @@ def check_tokens() -> bool:
     return False
 
 
-def main() -> None:
-    """The bot's main logic."""
-    homeworks = []
-    errors = []
+def fan_out(bot: 'telegram.Bot', chat_ids: tuple, message: str) -> None:
+    """Sends the message to every chat."""
+    for chat_id in chat_ids:
+        deliver_message(bot, chat_id, message)
+
+
+def broadcast(bot: 'telegram.Bot', chat_ids: tuple, message: str) -> None:
+    """Sends status changes to the chats and to the configured sinks.
+    NOTIFY_CHAT_IDS are added to the chats. Webhook and JSONL sinks
+    run on their own thread pool, so they never hold up the poll.
+    Error alerts are not broadcast, they go to the tenant's chats only.
+    """
+    from homework_bot import sinks
+
+    extra = [
+        chat_id for chat_id in sinks.NOTIFY_CHAT_IDS
+        if chat_id not in chat_ids
+    ]
+    fan_out(bot, (*chat_ids, *extra), message)
+    sinks.dispatcher().dispatch(message, chat_ids)
+
+
+def notify_changes(bot: 'telegram.Bot', tenant: 'Tenant',
+                   state: 'TenantState', scope: str, homeworks: tuple) -> None:
+    """Updates the board and sends new statuses to every chat.
+    Statuses are marked notified only after an outbox `bot` has written
+    the messages to disk, so a crash in between sends them again
+    instead of losing them.
+    """
+    from homework_bot.diff import diff_homeworks, render_batch
+
+    for chat_id in tenant.chat_ids:
+        state.board.update(chat_id, homeworks)
+    state.board.track(scope, homeworks)
+    state.last_status = homeworks[0].status
+    events = diff_homeworks(scope, homeworks, state.notified)
+    for message in render_batch(
+        [status_message(event.homework) for event in events]
+    ):
+        broadcast(bot, tenant.chat_ids, message)
+    flush = getattr(bot, 'flush', None)
+    if events and flush is not None:
+        flush()
+    for event in events:
+        state.notified.add(event.key)
+
+
+def report_invalid(bot: 'telegram.Bot', tenant: 'Tenant',
+                   state: 'TenantState', errors: tuple) -> None:
+    """Reports homeworks skipped by validation like a failed cycle."""
+    from homework_bot.models import ValidationError
+
+    error = ValidationError.of(list(errors))
+    message = f'Programm failure! \n {error}'
+    logger.error(message)
+    if state.errors.record(error):
+        fan_out(bot, tenant.chat_ids, message)
+
+
+def poll_tenant(bot: 'telegram.Bot', tenant: 'Tenant',
+                state: 'TenantState', endpoint: str = ENDPOINT) -> bool:
+    """Runs one poll cycle for the tenant or subscription.
+    The account is fetched once, concurrent fetches of the same
+    account and `from_date` are merged, the result goes to every chat
+    in `tenant.chat_ids`. Outbound calls share the CYCLE_DEADLINE
+    budget. Returns True if the cycle went without errors.
+    """
+    from homework_bot import deadlines
+    from homework_bot.cursor import tenant_key
+
+    scope = tenant_key(tenant.practicum_token)
+    try:
+        with deadlines.budget():
+            response = state.flights.do(
+                (tenant.practicum_token, state.from_date), fetch_homeworks,
+                tenant.practicum_token, state.from_date, endpoint,
+                state.cache.headers(scope)
+            )
+        fingerprint = state.cache.lookup(scope, response)
+        if fingerprint.unchanged:
+            current_date = fingerprint.current_date
+        else:
+            answer = validate_answer(decode_answer(response), partial=True)
+            if answer.homeworks:
+                notify_changes(bot, tenant, state, scope, answer.homeworks)
+            if answer.errors:
+                report_invalid(bot, tenant, state, answer.errors)
+            current_date = answer.current_date
+            state.cache.store(scope, fingerprint)
+        if isinstance(current_date, int) and current_date > state.from_date:
+            state.from_date = current_date
+        for chat_id in tenant.chat_ids:
+            state.board.touch(chat_id)
+        state.failures = 0
+        success = True
+    except Exception as e:
+        message = f'Programm failure! \n {e}'
+        logger.error(message)
+        if state.errors.record(e):
+            fan_out(bot, tenant.chat_ids, message)
+        state.failures += 1
+        success = False
+    for summary in state.errors.summaries():
+        fan_out(bot, tenant.chat_ids, summary)
+    return success
+
+
+def main(once: bool = False) -> bool:
+    """The bot's main logic.
+    With `once` the bot makes one poll cycle, keeps its state on disk
+    and returns True if the cycle succeeded.
+    """
+    init()
+    import telegram
+
+    from homework_bot import sinks
+    from homework_bot.commands import COMMANDS_ENABLED, CommandPoller
+    from homework_bot.cursor import CursorStore, tenant_key
+    from homework_bot.errors import ErrorAggregator, ErrorStore
+    from homework_bot.outbound import SendQueue
+    from homework_bot.outbox import OUTBOX_DB, Outbox
+    from homework_bot.profiling import make_profiler
+    from homework_bot.scheduling import IntervalStats, make_schedule
+    from homework_bot.state import (DEFAULT_STATE_DB, STATE_DB,
+                                    NotificationState)
+    from homework_bot.tenants import Tenant, TenantState
+
     start_message = 'Searching for updates...'
     token_error_name = (
         'Some tokens or all of them are missed! '
@@ -182,27 +424,64 @@ def main() -> None:
     except telegram.error.InvalidToken:
         logger.error('Telegram token is invalid!')
         raise telegram.error.InvalidToken
-    send_message(bot, start_message)
+    if not once:
+        send_message(bot, start_message)
+    sender = SendQueue(bot).start()
+    outbox = Outbox(sender, path=OUTBOX_DB)
+    tenant = Tenant(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)
+    cursor = CursorStore()
+    state_path = STATE_DB or (DEFAULT_STATE_DB if once else None)
+    error_store = ErrorStore(state_path)
+    state = TenantState(
+        from_date=cursor.load(
+            PRACTICUM_TOKEN, current_timestamp - TIME_SIGNATURE_UNIX
+        ),
+        notified=NotificationState(path=state_path),
+        errors=ErrorAggregator(
+            store=error_store, scope=tenant_key(PRACTICUM_TOKEN)
+        )
+    )
+    if not once:
+        outbox.start()
+        metrics.start_metrics_server()
+        if COMMANDS_ENABLED:
+            CommandPoller(bot, state.board, sender).start()
+    profiler = make_profiler(signals=not once)
+    schedule = make_schedule(RETRY_TIME, RETRY_TIME_AFTER_ERROR)
+    intervals = IntervalStats()
     while True:
-        try:
-            response = get_api_answer(current_timestamp - TIME_SIGNATURE_UNIX)
-            lst_of_homeworks = check_response(response)
-            list_bool = check_list_of_homeworks(lst_of_homeworks)
-            if list_bool:
-                status = parse_status(lst_of_homeworks[0])
-                if status not in homeworks:
-                    homeworks.append(status)
-                    send_message(bot, status)
-            errors.clear()
-            time.sleep(RETRY_TIME)
-        except Exception as e:
-            message = f'Programm failure! \n {e}'
-            logger.error(message)
-            if e.__repr__() not in errors:
-                errors.append(e.__repr__())
-                send_message(bot, message)
-            time.sleep(RETRY_TIME_AFTER_ERROR)
+        with profiler.cycle(), metrics.Timer() as timer:
+            success = poll_tenant(outbox, tenant, state)
+        metrics.CYCLE_SECONDS.observe(timer.elapsed)
+        metrics.TRACKED_HOMEWORKS.set(state.board.homeworks_count())
+        if success and cursor.advance(
+            tenant.practicum_token, state.from_date
+        ):
+            cursor.save()
+        if once:
+            sinks.close()
+            outbox.close()
+            sender.stop()
+            state.notified.close()
+            error_store.close()
+            return success
+        interval = schedule.next_interval(state, success)
+        intervals.record(interval)
+        metrics.SLEEP_SECONDS.observe(interval)
+        logger.info(
+            f'Next poll in {interval:.0f} s. '
+            f'Intervals: {intervals.as_dict()}'
+        )
+        time.sleep(interval)
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Homework statuses bot.')
+    parser.add_argument(
+        '--once', action='store_true',
+        help='make one poll cycle, save the state and exit'
+    )
+    if not main(once=parser.parse_args().once):
+        raise SystemExit(1)
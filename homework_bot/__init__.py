@@ -0,0 +1 @@
+"""Services built around the homework bot's polling pipeline."""
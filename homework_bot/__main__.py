@@ -0,0 +1,7 @@
+import homework
+
+homework.init()
+
+from homework_bot.engine import main  # noqa: E402
+
+main()
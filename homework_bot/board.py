@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+from collections import deque
+
+STATUS_HISTORY_SIZE = int(os.getenv('STATUS_HISTORY_SIZE', 20))
+
+
+class StatusBoard:
+    """Last known homework statuses of every chat.
+    Filled by the poll loop, read by the inbound commands, so users
+    get an answer without an extra request to the Practicum API.
+    """
+
+    def __init__(self, history_size: int = STATUS_HISTORY_SIZE) -> None:
+        """Starts with an empty board."""
+        self.history_size = history_size
+        self._statuses = {}
+        self._history = {}
+        self._checked_at = {}
+        self._tracked = {}
+        self._lock = threading.Lock()
+
+    def touch(self, chat_id: str) -> None:
+        """Marks that statuses of the chat were just checked."""
+        with self._lock:
+            self._checked_at[str(chat_id)] = time.time()
+
+    def update(self, chat_id: str, homeworks: list) -> None:
+        """Stores statuses of Homework records, changes go to history."""
+        chat_id = str(chat_id)
+        now = time.time()
+        with self._lock:
+            statuses = self._statuses.setdefault(chat_id, {})
+            history = self._history.setdefault(
+                chat_id, deque(maxlen=self.history_size)
+            )
+            for homework in reversed(homeworks):
+                if statuses.get(homework.name) != homework.status:
+                    history.append((now, homework.name, homework.status))
+                statuses[homework.name] = homework.status
+
+    def track(self, scope: str, homeworks: list) -> None:
+        """Counts Homework records of the scope (tenant) as known."""
+        with self._lock:
+            self._tracked.setdefault(scope, set()).update(
+                homework.key_id for homework in homeworks
+            )
+
+    def homeworks_count(self) -> int:
+        """Number of homeworks with a known status, once per tenant.
+        A homework sent to several chats of the tenant counts once.
+        """
+        with self._lock:
+            return sum(len(known) for known in self._tracked.values())
+
+    def checked_at(self, chat_id: str) -> float:
+        """Time of the last successful check or None."""
+        with self._lock:
+            return self._checked_at.get(str(chat_id))
+
+    def statuses(self, chat_id: str) -> dict:
+        """Homework name to status of the chat."""
+        with self._lock:
+            return dict(self._statuses.get(str(chat_id), {}))
+
+    def history(self, chat_id: str) -> list:
+        """Status changes of the chat, the oldest first."""
+        with self._lock:
+            return list(self._history.get(str(chat_id), ()))
@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from homework_bot import metrics
+
+logger = logging.getLogger(__name__)
+
+BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', 20))
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', 10))
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', 0.5))
+BREAKER_OPEN_TIME = float(os.getenv('BREAKER_OPEN_TIME', 30))
+BREAKER_PROBES = int(os.getenv('BREAKER_PROBES', 1))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_CODES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+
+class CircuitOpenError(ConnectionError):
+    """The endpoint is considered down, the request was not made."""
+
+
+def is_outage(error: Exception) -> bool:
+    """Whether the error means the endpoint itself is failing.
+    Server errors and network errors count, client errors like a bad
+    token of one tenant do not.
+    """
+    response = getattr(error, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    if status_code is not None:
+        return status_code >= 500
+    return isinstance(error, OSError)
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint that keeps failing.
+    Closed: calls go through, outcomes of the last `window` calls are
+    kept and the circuit opens once at least `min_calls` of them
+    fail at `failure_rate` or more. Open: calls fail fast with
+    CircuitOpenError for `open_time` seconds. Half-open: up to
+    `probes` calls go through, the circuit closes if they all succeed
+    and opens again on the first failure.
+    Transitions are logged, exported as metrics and passed to
+    listeners added with `subscribe`.
+    """
+
+    def __init__(self, name: str, window: int = BREAKER_WINDOW,
+                 min_calls: int = BREAKER_MIN_CALLS,
+                 failure_rate: float = BREAKER_FAILURE_RATE,
+                 open_time: float = BREAKER_OPEN_TIME,
+                 probes: int = BREAKER_PROBES,
+                 clock=time.monotonic) -> None:
+        """Starts closed."""
+        if probes < 1:
+            raise ValueError('Half-open state needs at least one probe.')
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_time = open_time
+        self.probes = probes
+        self.clock = clock
+        self.state = CLOSED
+        self._results = deque(maxlen=window)
+        self._opened_at = None
+        self._probes_in_flight = 0
+        self._probes_passed = 0
+        self._listeners = []
+        self._pending = []
+        self._lock = threading.Lock()
+        metrics.BREAKER_STATE.set(STATE_CODES[CLOSED], breaker=name)
+
+    def subscribe(self, listener) -> None:
+        """Calls `listener(name, old_state, new_state)` on transitions."""
+        self._listeners.append(listener)
+
+    def _set_state(self, state: str) -> None:
+        """Changes the state, call with the lock held."""
+        if state == self.state:
+            return
+        self._pending.append((self.state, state))
+        self.state = state
+        if state == OPEN:
+            self._opened_at = self.clock()
+        elif state == HALF_OPEN:
+            self._probes_in_flight = 0
+            self._probes_passed = 0
+        else:
+            self._results.clear()
+
+    def _publish(self) -> None:
+        with self._lock:
+            transitions, self._pending = self._pending, []
+        for old, new in transitions:
+            logger.warning(f'Circuit breaker {self.name}: {old} -> {new}.')
+            metrics.BREAKER_STATE.set(STATE_CODES[new], breaker=self.name)
+            metrics.BREAKER_TRANSITIONS.inc(breaker=self.name, state=new)
+            for listener in self._listeners:
+                listener(self.name, old, new)
+
+    def _before_call(self) -> bool:
+        """Lets the call through or raises, True for a probe call."""
+        with self._lock:
+            if (self.state == OPEN
+                    and self.clock() - self._opened_at >= self.open_time):
+                self._set_state(HALF_OPEN)
+            if self.state == OPEN:
+                raise CircuitOpenError(f'Circuit {self.name} is open.')
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.probes:
+                    raise CircuitOpenError(
+                        f'Circuit {self.name} is waiting for probes.'
+                    )
+                self._probes_in_flight += 1
+                return True
+            return False
+
+    def _after_call(self, probe: bool, failed: bool) -> None:
+        with self._lock:
+            if probe:
+                self._probes_in_flight -= 1
+                if self.state != HALF_OPEN:
+                    return
+                if failed:
+                    self._set_state(OPEN)
+                    return
+                self._probes_passed += 1
+                if self._probes_passed >= self.probes:
+                    self._set_state(CLOSED)
+                return
+            if self.state != CLOSED:
+                return
+            self._results.append(failed)
+            if (len(self._results) >= self.min_calls and sum(self._results)
+                    >= self.failure_rate * len(self._results)):
+                self._set_state(OPEN)
+
+    def call(self, func, *args, **kwargs):
+        """Result of `func(*args, **kwargs)` unless the circuit is open."""
+        try:
+            probe = self._before_call()
+        finally:
+            self._publish()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            self._after_call(probe, is_outage(error))
+            self._publish()
+            raise
+        self._after_call(probe, False)
+        self._publish()
+        return result
+
+    def reset(self) -> None:
+        """Closes the circuit and forgets recorded calls."""
+        with self._lock:
+            self._set_state(CLOSED)
+            self._results.clear()
+        self._publish()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(endpoint: str) -> CircuitBreaker:
+    """Circuit breaker of the endpoint, shared by all tenants."""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+        return breaker
+
+
+def reset_all() -> None:
+    """Closes every circuit."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        breaker.reset()
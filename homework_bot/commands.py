@@ -0,0 +1,151 @@
+import logging
+import os
+import threading
+import time
+
+import telegram
+
+import homework
+from homework_bot.board import StatusBoard
+from homework_bot.cursor import save_json
+
+logger = logging.getLogger(__name__)
+
+COMMANDS_OFFSET_FILE = os.getenv(
+    'COMMANDS_OFFSET_FILE', 'updates_offset.json'
+)
+COMMANDS_ENABLED = os.getenv('COMMANDS_ENABLED', 'true').lower() in (
+    '1', 'true'
+)
+COMMANDS_LONG_POLL = int(os.getenv('COMMANDS_LONG_POLL', 30))
+STATUS_MAX_STALENESS = int(
+    os.getenv('STATUS_MAX_STALENESS', homework.RETRY_TIME * 2)
+)
+
+
+def render_status(board: StatusBoard, chat_id: str,
+                  max_staleness: int = STATUS_MAX_STALENESS) -> str:
+    """Answer to /status built from the board.
+    The API only returns homeworks changed since the cursor, so an
+    empty board means no status is known since the start, not that
+    there are no homeworks.
+    """
+    checked_at = board.checked_at(chat_id)
+    if checked_at is None:
+        return 'Статусы ещё не проверялись, попробуйте позже.'
+    statuses = board.statuses(chat_id)
+    if statuses:
+        lines = [
+            f'"{name}": {homework.HOMEWORK_STATUSES.get(status, status)}'
+            for name, status in statuses.items()
+        ]
+    else:
+        lines = [
+            'С момента запуска бота статусы работ не менялись, '
+            'текущие статусы неизвестны.'
+        ]
+    age = time.time() - checked_at
+    if age > max_staleness:
+        lines.append(
+            f'Данные могли устареть: последняя проверка '
+            f'{age // 60:.0f} мин назад.'
+        )
+    return '\n'.join(lines)
+
+
+def render_history(board: StatusBoard, chat_id: str) -> str:
+    """Answer to /history built from the board."""
+    history = board.history(chat_id)
+    if not history:
+        return 'Изменений статусов пока не было.'
+    return '\n'.join(
+        f'{time.strftime("%Y-%m-%d %H:%M", time.localtime(changed_at))} '
+        f'"{name}": {homework.HOMEWORK_STATUSES.get(status, status)}'
+        for changed_at, name, status in history
+    )
+
+
+class CommandPoller:
+    """Answers /status and /history received through getUpdates.
+    Answers come from the status board only, the Practicum API is
+    never requested. The update offset is kept in a file, so updates
+    are not answered twice after a restart.
+    """
+
+    def __init__(self, bot: telegram.Bot, board: StatusBoard,
+                 sender=None, offset_path: str = COMMANDS_OFFSET_FILE,
+                 long_poll: int = COMMANDS_LONG_POLL,
+                 max_staleness: int = STATUS_MAX_STALENESS) -> None:
+        """Reads the saved offset, replies go through `sender` if given."""
+        self.bot = bot
+        self.board = board
+        self.sender = sender or bot
+        self.offset_path = offset_path
+        self.long_poll = long_poll
+        self.max_staleness = max_staleness
+        self.offset = self._read_offset()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _read_offset(self) -> int:
+        try:
+            with open(self.offset_path, encoding='utf-8') as file:
+                return int(file.read())
+        except (OSError, ValueError):
+            return None
+
+    def answer(self, chat_id: str, text: str) -> str:
+        """Reply to the command or None if it is not a known command."""
+        words = text.split(maxsplit=1)
+        if not words:
+            return None
+        command = words[0].split('@', 1)[0].lower()
+        if command == '/status':
+            return render_status(self.board, chat_id, self.max_staleness)
+        if command == '/history':
+            return render_history(self.board, chat_id)
+        return None
+
+    def poll(self) -> int:
+        """Fetches one batch of updates and answers commands in it."""
+        updates = self.bot.get_updates(
+            offset=self.offset, timeout=self.long_poll,
+            allowed_updates=['message']
+        )
+        answered = 0
+        for update in updates:
+            self.offset = update.update_id + 1
+            message = update.message
+            if message is None or not message.text:
+                continue
+            reply = self.answer(message.chat_id, message.text)
+            if reply is not None:
+                homework.deliver_message(self.sender, message.chat_id, reply)
+                answered += 1
+        if updates:
+            save_json(self.offset_path, self.offset)
+        return answered
+
+    def run(self) -> None:
+        """Polls updates until `stop` is called."""
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except telegram.TelegramError as error:
+                logger.error(f'Cannot get updates: {error}')
+                self._stopped.wait(homework.RETRY_TIME_AFTER_ERROR)
+            except Exception as error:
+                logger.exception(f'Commands cannot be handled: {error}')
+                self._stopped.wait(homework.RETRY_TIME_AFTER_ERROR)
+
+    def start(self) -> 'CommandPoller':
+        """Runs the poller in a background thread."""
+        self._thread = threading.Thread(
+            target=self.run, name='command-poller', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Asks the poller to stop after the current long poll."""
+        self._stopped.set()
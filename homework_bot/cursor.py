@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+CURSOR_FILE = os.getenv('CURSOR_FILE', 'cursor.json')
+
+
+def save_json(path: str, data) -> None:
+    """Writes JSON to a temporary file and replaces the old one."""
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(
+        dir=directory, prefix='.homework-bot-', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def tenant_key(token: str) -> str:
+    """Short stable key of the token that is safe to keep on disk."""
+    return hashlib.sha256(str(token).encode()).hexdigest()[:16]
+
+
+def is_timestamp(value) -> bool:
+    """Whether the value can be used as `from_date`."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class CursorStore:
+    """Keeps `from_date` of every tenant in a JSON file.
+    The cursor only moves forward, the file is replaced atomically.
+    """
+
+    def __init__(self, path: str = CURSOR_FILE) -> None:
+        """Reads saved cursors if the file exists."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._cursors = self._read()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as error:
+            logger.error(f'Cursor file is broken, starting over: {error}')
+            return {}
+        if not isinstance(data, dict):
+            logger.error('Cursor file is broken, starting over.')
+            return {}
+        return {
+            key: value for key, value in data.items()
+            if isinstance(value, int)
+        }
+
+    def load(self, token: str, default: int) -> int:
+        """Returns saved `from_date` of the tenant or the default."""
+        with self._lock:
+            return self._cursors.get(tenant_key(token), default)
+
+    def advance(self, token: str, current_date: int) -> bool:
+        """Moves the cursor to `current_date` returned by the API.
+        Returns False if the value is not a newer timestamp.
+        """
+        if not is_timestamp(current_date):
+            return False
+        key = tenant_key(token)
+        with self._lock:
+            if current_date <= self._cursors.get(key, current_date - 1):
+                return False
+            self._cursors[key] = current_date
+        return True
+
+    def save(self) -> None:
+        """Writes cursors to the file atomically."""
+        with self._lock:
+            data = dict(self._cursors)
+        save_json(self.path, data)
+
+
+class SqliteCursorStore:
+    """Keeps `from_date` of every tenant in SQLite.
+    Unlike CursorStore the file can be shared by several processes:
+    every cursor is updated on its own and only moves forward.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Opens the database and creates the table if needed."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS cursors ('
+            'tenant TEXT PRIMARY KEY, from_date INTEGER)'
+        )
+        self._db.commit()
+
+    def load(self, token: str, default: int) -> int:
+        """Returns saved `from_date` of the tenant or the default."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT from_date FROM cursors WHERE tenant = ?',
+                (tenant_key(token),)
+            ).fetchone()
+        return default if row is None else row[0]
+
+    def advance(self, token: str, current_date: int) -> bool:
+        """Moves the cursor to `current_date` returned by the API.
+        Returns False if the value is not a newer timestamp.
+        """
+        if not is_timestamp(current_date):
+            return False
+        with self._lock:
+            cursor = self._db.execute(
+                'INSERT INTO cursors (tenant, from_date) VALUES (?, ?) '
+                'ON CONFLICT (tenant) DO UPDATE SET from_date = '
+                'excluded.from_date WHERE excluded.from_date > from_date',
+                (tenant_key(token), current_date)
+            )
+        return cursor.rowcount > 0
+
+    def save(self) -> None:
+        """Commits advanced cursors."""
+        with self._lock:
+            self._db.commit()
+
+    def close(self) -> None:
+        """Commits and closes the database."""
+        with self._lock:
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+CYCLE_DEADLINE = float(os.getenv('CYCLE_DEADLINE', 30))
+CONNECT_TIMEOUT = float(os.getenv('CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.getenv('READ_TIMEOUT', 20))
+TELEGRAM_TIMEOUT = float(os.getenv('TELEGRAM_TIMEOUT', 10))
+
+
+class DeadlineExceeded(TimeoutError):
+    """The time budget is spent, the call was not made."""
+
+
+class Deadline:
+    """Time budget shared by the calls of one poll cycle."""
+
+    def __init__(self, budget: float, clock=time.monotonic) -> None:
+        """Starts counting the budget down."""
+        self.clock = clock
+        self.expires_at = clock() + budget
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(self.expires_at - self.clock(), 0.0)
+
+    def timeout(self, connect: float = CONNECT_TIMEOUT,
+                read: float = READ_TIMEOUT) -> tuple:
+        """(connect, read) timeouts cut down to the remaining budget."""
+        remaining = self.remaining()
+        if not remaining:
+            raise DeadlineExceeded('Deadline of the poll cycle is exceeded.')
+        return min(connect, remaining), min(read, remaining)
+
+
+_local = threading.local()
+
+
+def current() -> Deadline:
+    """Deadline of the running cycle in this thread, None outside one."""
+    return getattr(_local, 'deadline', None)
+
+
+@contextmanager
+def budget(seconds: float = None):
+    """Runs the block under a deadline of `seconds`.
+    A nested budget cannot outlive the one around it.
+    """
+    outer = current()
+    deadline = Deadline(CYCLE_DEADLINE if seconds is None else seconds)
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    _local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = outer
+
+
+def timeout(connect: float = CONNECT_TIMEOUT,
+            read: float = READ_TIMEOUT) -> tuple:
+    """Timeouts for an outbound call made now.
+    Inside `budget` they are cut down to what is left of it, raising
+    DeadlineExceeded once it is spent.
+    """
+    deadline = current()
+    if deadline is None:
+        return connect, read
+    return deadline.timeout(connect, read)
@@ -0,0 +1,169 @@
+import json
+import os
+from json.decoder import JSONDecodeError
+
+JSON_DECODER = os.getenv('JSON_DECODER', 'auto')
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 64 * 1024))
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+_backends = {}
+
+
+def backend(name: str = None) -> str:
+    """Name of the decoder in use: `orjson` if installed or `json`.
+    JSON_DECODER forces one of them, `auto` picks the fastest.
+    """
+    name = name or JSON_DECODER
+    if name not in _backends:
+        if name not in ('auto', 'orjson', 'json'):
+            raise ValueError(f'Unknown JSON decoder: {name}')
+        chosen = 'json'
+        if name != 'json':
+            try:
+                import orjson  # noqa: F401
+                chosen = 'orjson'
+            except ImportError:
+                if name == 'orjson':
+                    raise
+        _backends[name] = chosen
+    return _backends[name]
+
+
+def loads(data):
+    """Decodes a JSON document from bytes or str.
+    Raises JSONDecodeError whatever decoder is used.
+    """
+    if backend() == 'orjson':
+        import orjson
+
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+class HomeworkStream:
+    """Yields homeworks of an API answer while it is being read.
+    Only one homework is decoded at a time, so memory stays bounded
+    by the largest homework and not by the whole history. Other
+    top-level fields, like `current_date`, are in `fields` once the
+    stream is exhausted.
+    """
+
+    def __init__(self, chunks) -> None:
+        """Reads the answer from an iterable of bytes or str chunks."""
+        self.fields = {}
+        self._chunks = iter(chunks)
+        self._tail = b''
+        self._buffer = ''
+        self._position = 0
+        self._exhausted = False
+        self._seen_homeworks = False
+
+    def _more(self) -> bool:
+        if self._exhausted:
+            return False
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            if isinstance(chunk, (bytes, bytearray)):
+                chunk = self._tail + bytes(chunk)
+                try:
+                    text = chunk.decode('utf-8')
+                    self._tail = b''
+                except UnicodeDecodeError as error:
+                    if error.start < len(chunk) - 3:
+                        raise
+                    text = chunk[:error.start].decode('utf-8')
+                    self._tail = chunk[error.start:]
+            else:
+                text = chunk
+            self._buffer = self._buffer[self._position:] + text
+            self._position = 0
+            return True
+        self._exhausted = True
+        if self._tail:
+            raise self._error('Truncated UTF-8 sequence')
+        return False
+
+    def _error(self, message: str) -> JSONDecodeError:
+        return JSONDecodeError(message, self._buffer, self._position)
+
+    def _char(self) -> str:
+        """Next non-whitespace character, not consumed."""
+        while True:
+            while (self._position < len(self._buffer)
+                   and self._buffer[self._position] in _WHITESPACE):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._more():
+                return ''
+
+    def _expect(self, expected: str) -> str:
+        char = self._char()
+        if char not in expected:
+            raise self._error(f'Expecting one of {expected!r}')
+        self._position += 1
+        return char
+
+    def _value(self):
+        """Decodes the next value, reading more until it is complete.
+        A value is complete when something follows it, otherwise
+        a number could be cut in the middle.
+        """
+        self._char()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._position)
+            except JSONDecodeError:
+                if self._more():
+                    continue
+                raise
+            following = end
+            while (following < len(self._buffer)
+                   and self._buffer[following] in _WHITESPACE):
+                following += 1
+            if following < len(self._buffer) or not self._more():
+                self._position = end
+                return value
+
+    def __iter__(self):
+        """Homeworks in the order of the answer."""
+        self._expect('{')
+        closed = self._char() == '}'
+        if closed:
+            self._position += 1
+        while not closed:
+            key = self._value()
+            if not isinstance(key, str):
+                raise self._error('Expecting property name')
+            self._expect(':')
+            if key == 'homeworks':
+                yield from self._homeworks()
+            else:
+                self.fields[key] = self._value()
+            closed = self._expect(',}') == '}'
+        if self._char():
+            raise self._error('Extra data')
+        if not self._seen_homeworks:
+            raise KeyError('homeworks')
+
+    def _homeworks(self):
+        self._seen_homeworks = True
+        if self._char() != '[':
+            raise TypeError('List of homeworks is not actually a list!')
+        self._position += 1
+        if self._char() == ']':
+            self._position += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
+
+
+def stream_homeworks(response, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Streams homeworks of a response fetched with stream=True."""
+    return HomeworkStream(response.iter_content(chunk_size=chunk_size))
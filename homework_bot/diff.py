@@ -0,0 +1,43 @@
+from homework_bot.models import Homework, StatusEvent
+from homework_bot.state import NotificationState
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def homework_key(scope: str, homework: Homework) -> tuple:
+    """State key of the homework's current status."""
+    return NotificationState.make_key(
+        scope, homework.key_id, homework.status
+    )
+
+
+def diff_homeworks(scope: str, homeworks: list,
+                   notified: NotificationState) -> list:
+    """Finds every homework whose status differs from the last notified.
+    The caller adds the keys of the events to `notified`, which makes
+    them the last known statuses.
+    """
+    events = []
+    seen = set()
+    for homework in homeworks:
+        key = homework_key(scope, homework)
+        if key in seen or key in notified:
+            continue
+        seen.add(key)
+        events.append(StatusEvent(key, homework))
+    return events
+
+
+def render_batch(messages: list,
+                 limit: int = TELEGRAM_MESSAGE_LIMIT) -> list:
+    """Joins messages into as few Telegram messages as possible."""
+    batches = []
+    current = ''
+    for message in messages:
+        if current and len(current) + len(message) + 2 > limit:
+            batches.append(current)
+            current = ''
+        current = f'{current}\n\n{message}' if current else message
+    if current:
+        batches.append(current)
+    return batches
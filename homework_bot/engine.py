@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import telegram
+
+import homework
+from homework_bot import metrics, sessions, sinks
+from homework_bot.board import StatusBoard
+from homework_bot.commands import COMMANDS_ENABLED, CommandPoller
+from homework_bot.cursor import CursorStore, tenant_key
+from homework_bot.errors import ErrorAggregator, ErrorStore
+from homework_bot.outbound import SendQueue
+from homework_bot.outbox import OUTBOX_DB, Outbox
+from homework_bot.profiling import Profiler, make_profiler
+from homework_bot.response_cache import ResponseCache
+from homework_bot.scheduling import FixedSchedule, IntervalStats, make_schedule
+from homework_bot.state import DEFAULT_STATE_DB, STATE_DB, NotificationState
+from homework_bot.singleflight import SingleFlight
+from homework_bot.tenants import (Subscription, TenantState, group_tenants,
+                                  load_tenants)
+
+logger = logging.getLogger(__name__)
+
+ENGINE_CONCURRENCY = int(os.getenv('ENGINE_CONCURRENCY', 100))
+
+
+@dataclass
+class CycleReport:
+    """Outcome of one poll cycle over all tenants."""
+
+    polled: int
+    failed: int
+    duration: float
+
+
+class PollingEngine:
+    """Polls many tenants from one event loop.
+    Blocking pipeline calls run in a thread pool, the number of
+    tenants polled at the same moment never exceeds `concurrency`.
+    """
+
+    def __init__(self, bot: telegram.Bot, tenants: list,
+                 concurrency: int = ENGINE_CONCURRENCY,
+                 endpoint: str = homework.ENDPOINT,
+                 cursor: CursorStore = None,
+                 notified: NotificationState = None,
+                 schedule: FixedSchedule = None,
+                 error_store: ErrorStore = None) -> None:
+        """Prepares a state for every Practicum account.
+        Tenants sharing a token become one Subscription polled once
+        per cycle. Accounts start from their saved cursors if a store
+        is given and share one notification state, response cache,
+        status board and single-flight group.
+        The schedule decides when every account is polled next.
+        With `error_store` error windows of accounts survive restarts.
+        """
+        if concurrency < 1:
+            raise ValueError('Concurrency must be a positive number.')
+        self.bot = bot
+        self.concurrency = concurrency
+        self.endpoint = endpoint
+        self.cursor = cursor
+        if notified is None:
+            notified = NotificationState()
+        self.notified = notified
+        self.error_store = error_store
+        self.cache = ResponseCache()
+        self.board = StatusBoard()
+        self.flights = SingleFlight()
+        if schedule is None:
+            schedule = make_schedule(
+                homework.RETRY_TIME, homework.RETRY_TIME_AFTER_ERROR
+            )
+        self.schedule = schedule
+        self.intervals = IntervalStats()
+        self.profiler = Profiler()
+        self.states = {}
+        self.assign(tenants)
+
+    def assign(self, tenants: list) -> None:
+        """Makes the engine poll exactly these tenants.
+        States of kept accounts are preserved, new accounts start
+        from their saved cursors.
+        """
+        from_date = int(time.time()) - homework.TIME_SIGNATURE_UNIX
+        old_states = {
+            subscription.practicum_token: state
+            for subscription, state in self.states.items()
+        }
+        states = {}
+        for subscription in group_tenants(tenants):
+            state = old_states.get(subscription.practicum_token)
+            if state is None:
+                subscription_from_date = from_date
+                if self.cursor is not None:
+                    subscription_from_date = self.cursor.load(
+                        subscription.practicum_token, from_date
+                    )
+                state = TenantState(
+                    from_date=subscription_from_date, notified=self.notified,
+                    cache=self.cache, board=self.board, flights=self.flights,
+                    errors=ErrorAggregator(
+                        store=self.error_store,
+                        scope=tenant_key(subscription.practicum_token)
+                    )
+                )
+            states[subscription] = state
+        self.states = states
+
+    async def poll(self, subscription: Subscription,
+                   semaphore: asyncio.Semaphore,
+                   executor: ThreadPoolExecutor) -> bool:
+        """Runs the poll pipeline for one subscription."""
+        loop = asyncio.get_running_loop()
+        state = self.states[subscription]
+        async with semaphore:
+            success = await loop.run_in_executor(
+                executor, self.profiler.run, homework.poll_tenant,
+                self.bot, subscription, state, self.endpoint
+            )
+        interval = self.schedule.next_interval(state, success)
+        self.intervals.record(interval)
+        metrics.SLEEP_SECONDS.observe(interval)
+        state.next_poll_at = time.monotonic() + interval
+        return success
+
+    async def run_cycle(self) -> CycleReport:
+        """Polls every tenant whose poll is due."""
+        started = time.monotonic()
+        due = [
+            tenant for tenant, state in self.states.items()
+            if state.next_poll_at <= started
+        ]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with self.profiler.cycle(), ThreadPoolExecutor(
+            max_workers=self.concurrency
+        ) as executor:
+            results = await asyncio.gather(*(
+                self.poll(tenant, semaphore, executor) for tenant in due
+            ))
+        if self.cursor is not None:
+            advanced = [
+                self.cursor.advance(tenant.practicum_token, state.from_date)
+                for tenant, state in self.states.items()
+            ]
+            if any(advanced):
+                self.cursor.save()
+        report = CycleReport(
+            polled=len(results),
+            failed=results.count(False),
+            duration=time.monotonic() - started
+        )
+        metrics.CYCLE_SECONDS.observe(report.duration)
+        metrics.TRACKED_HOMEWORKS.set(self.board.homeworks_count())
+        logger.info(
+            f'Cycle is over: {report.polled} tenants polled, '
+            f'{report.failed} failed, {report.duration:.2f} s spent. '
+            f'Connections: {sessions.shared_pool.stats()}. '
+            f'Response cache: {self.cache.stats()}. '
+            f'Intervals: {self.intervals.as_dict()}'
+        )
+        return report
+
+    def error_counts(self) -> dict:
+        """Occurrences of every error fingerprint over all tenants."""
+        counts = {}
+        for state in self.states.values():
+            for key, count in state.errors.counts().items():
+                counts[key] = counts.get(key, 0) + count
+        return counts
+
+    async def run_forever(self) -> None:
+        """Polls tenants until the process is stopped."""
+        while True:
+            await self.run_cycle()
+            next_poll_at = min(
+                (state.next_poll_at for state in self.states.values()),
+                default=time.monotonic() + homework.RETRY_TIME
+            )
+            await asyncio.sleep(max(next_poll_at - time.monotonic(), 0))
+
+
+def main() -> None:
+    """Runs the engine for tenants listed in the file from argv.
+    Call `homework.init` first, `python -m homework_bot` does it.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m homework_bot',
+        description='Polls many Practicum accounts from one process.'
+    )
+    parser.add_argument('tenants', help='JSON file with tenants')
+    parser.add_argument(
+        '--once', action='store_true',
+        help='make one poll cycle, save the state and exit'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='split tenants between this many worker processes'
+    )
+    args = parser.parse_args()
+    if args.workers > 1:
+        if args.once:
+            parser.error('--once works with one worker only')
+        from homework_bot.supervisor import Supervisor
+
+        Supervisor(args.tenants, args.workers).run()
+        return
+    if not homework.TELEGRAM_TOKEN:
+        logger.critical('Telegram token is missed!')
+        raise KeyError('TELEGRAM_TOKEN')
+    bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    sender = SendQueue(bot).start()
+    outbox = Outbox(sender, path=OUTBOX_DB)
+    state_path = STATE_DB or (DEFAULT_STATE_DB if args.once else None)
+    notified = NotificationState(path=state_path)
+    error_store = ErrorStore(state_path) if state_path else None
+    engine = PollingEngine(
+        outbox, load_tenants(args.tenants), cursor=CursorStore(),
+        notified=notified, error_store=error_store
+    )
+    engine.profiler = make_profiler(signals=not args.once)
+    if not args.once:
+        outbox.start()
+        metrics.start_metrics_server()
+        if COMMANDS_ENABLED:
+            CommandPoller(bot, engine.board, sender).start()
+        asyncio.run(engine.run_forever())
+    report = asyncio.run(engine.run_cycle())
+    sinks.close()
+    outbox.close()
+    sender.stop()
+    notified.close()
+    if error_store is not None:
+        error_store.close()
+    if report.failed:
+        raise SystemExit(1)
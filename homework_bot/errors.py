@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from collections import deque
+
+ERROR_WINDOW = int(os.getenv('ERROR_WINDOW', 60 * 10))
+ERROR_SUMMARY_INTERVAL = int(os.getenv('ERROR_SUMMARY_INTERVAL', 60 * 10))
+
+
+def fingerprint(error: BaseException) -> str:
+    """Identifies the error by its type and the place it was raised."""
+    origin = 'unknown'
+    frames = traceback.extract_tb(error.__traceback__)
+    if frames:
+        frame = frames[-1]
+        origin = (
+            f'{os.path.basename(frame.filename)}:{frame.name}:{frame.lineno}'
+        )
+    return f'{type(error).__name__}@{origin}'
+
+
+class ErrorStore:
+    """Error windows of every tenant in SQLite.
+    Lets one-shot runs started by cron throttle repeated errors like a
+    long-running bot does. Shared by the aggregators of one process.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        """Opens the database, in memory if `path` is not given."""
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS errors ('
+            'scope TEXT, fingerprint TEXT, message TEXT, '
+            'occurrences TEXT, reported_at REAL, unreported INTEGER, '
+            'PRIMARY KEY (scope, fingerprint))'
+        )
+        self._db.commit()
+
+    def load(self, scope: str) -> dict:
+        """Fingerprint to (occurrences, details) of the scope."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT fingerprint, message, occurrences, reported_at, '
+                'unreported FROM errors WHERE scope = ?', (scope,)
+            ).fetchall()
+        return {
+            key: (deque(json.loads(occurrences)), {
+                'message': message,
+                'reported_at': reported_at,
+                'unreported': unreported,
+            })
+            for key, message, occurrences, reported_at, unreported in rows
+        }
+
+    def save(self, scope: str, key: str, occurrences: deque,
+             details: dict) -> None:
+        """Stores the window of one error."""
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO errors VALUES (?, ?, ?, ?, ?, ?)',
+                (scope, key, details['message'], json.dumps(list(occurrences)),
+                 details['reported_at'], details['unreported'])
+            )
+            self._db.commit()
+
+    def delete(self, scope: str, key: str) -> None:
+        """Forgets the error once its window is empty."""
+        with self._lock:
+            self._db.execute(
+                'DELETE FROM errors WHERE scope = ? AND fingerprint = ?',
+                (scope, key)
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        """Closes the database."""
+        with self._lock:
+            self._db.close()
+
+
+class ErrorAggregator:
+    """Counts errors by fingerprint inside a sliding time window.
+    The first occurrence of an error is reported at once, repeats
+    are reported as periodic summaries. With a `store` the windows of
+    the `scope` survive restarts.
+    """
+
+    def __init__(self, window: int = ERROR_WINDOW,
+                 summary_interval: int = ERROR_SUMMARY_INTERVAL,
+                 store: ErrorStore = None, scope: str = '') -> None:
+        """Sets the window and how often summaries are produced."""
+        self.window = window
+        self.summary_interval = summary_interval
+        self.store = store
+        self.scope = scope
+        self._occurrences = {}
+        self._details = {}
+        self._lock = threading.Lock()
+        if store is not None:
+            for key, (occurrences, details) in store.load(scope).items():
+                self._occurrences[key] = occurrences
+                self._details[key] = details
+
+    def _save(self, key: str) -> None:
+        if self.store is not None:
+            self.store.save(
+                self.scope, key, self._occurrences[key], self._details[key]
+            )
+
+    def record(self, error: BaseException) -> bool:
+        """Registers the error.
+        Returns True if it is the first occurrence inside the window
+        and should be reported right away.
+        """
+        key = fingerprint(error)
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            occurrences = self._occurrences.get(key)
+            if not occurrences:
+                self._occurrences[key] = deque([now])
+                self._details[key] = {
+                    'message': str(error),
+                    'reported_at': now,
+                    'unreported': 0,
+                }
+                self._save(key)
+                return True
+            occurrences.append(now)
+            details = self._details[key]
+            details['message'] = str(error)
+            details['unreported'] += 1
+            self._save(key)
+            return False
+
+    def counts(self) -> dict:
+        """Number of occurrences of every error inside the window."""
+        with self._lock:
+            self._prune(time.time())
+            return {
+                key: len(occurrences)
+                for key, occurrences in self._occurrences.items()
+            }
+
+    def summaries(self) -> list:
+        """Messages about errors that repeated since the last report."""
+        now = time.time()
+        messages = []
+        with self._lock:
+            self._prune(now)
+            for key, details in self._details.items():
+                if not details['unreported']:
+                    continue
+                if now - details['reported_at'] < self.summary_interval:
+                    continue
+                messages.append(
+                    f'Programm failure! \n {details["message"]} \n'
+                    f'{len(self._occurrences[key])} occurrences '
+                    f'in the last {self.window // 60} min ({key})'
+                )
+                details['reported_at'] = now
+                details['unreported'] = 0
+                self._save(key)
+        return messages
+
+    def _prune(self, now: float) -> None:
+        for key in list(self._occurrences):
+            occurrences = self._occurrences[key]
+            while occurrences and now - occurrences[0] > self.window:
+                occurrences.popleft()
+            if not occurrences:
+                del self._occurrences[key]
+                del self._details[key]
+                if self.store is not None:
+                    self.store.delete(self.scope, key)
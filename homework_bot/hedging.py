@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from homework_bot import deadlines, metrics
+
+logger = logging.getLogger(__name__)
+
+HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', '').lower() in ('1', 'true')
+HEDGE_QUANTILE = float(os.getenv('HEDGE_QUANTILE', 0.95))
+HEDGE_WINDOW = int(os.getenv('HEDGE_WINDOW', 200))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', 20))
+HEDGE_BUDGET = float(os.getenv('HEDGE_BUDGET', 0.05))
+HEDGE_WORKERS = int(os.getenv('HEDGE_WORKERS', 128))
+
+
+def _close(future) -> None:
+    """Releases the connection of a response nobody will read."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), 'close', None)
+    if close is not None:
+        close()
+
+
+class Hedger:
+    """Sends a second copy of a slow idempotent request.
+    Latencies of the last `window` calls are kept, once there are
+    `min_samples` of them a call still running after their `quantile`
+    gets a hedge, unless hedges already make `budget` of the calls.
+    Both attempts run on a shared pool, the hedge with timeouts cut to
+    what is left of the caller's deadline; the first successful answer
+    is returned and the other one is closed. Without `enabled` or
+    before `min_samples` calls run in the calling thread and are only
+    timed.
+    """
+
+    def __init__(self, name: str, enabled: bool = HEDGE_ENABLED,
+                 quantile: float = HEDGE_QUANTILE,
+                 window: int = HEDGE_WINDOW,
+                 min_samples: int = HEDGE_MIN_SAMPLES,
+                 budget: float = HEDGE_BUDGET,
+                 executor: ThreadPoolExecutor = None) -> None:
+        """Starts with no latencies recorded and no hedges allowed."""
+        self.name = name
+        self.enabled = enabled
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.budget = budget
+        self.executor = executor
+        self._latencies = deque(maxlen=window)
+        self._tokens = 0.0
+        self._max_tokens = max(1.0, budget * window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        """Adds the latency of a successful call."""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def delay(self) -> float:
+        """Seconds to wait before hedging, None to not hedge."""
+        with self._lock:
+            if not self.enabled or len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * self.quantile), len(latencies) - 1)
+        return latencies[index]
+
+    def take_budget(self) -> bool:
+        """Spends the budget of one hedge if there is some left."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def executor_for(self) -> ThreadPoolExecutor:
+        """Pool the hedges run on."""
+        return self.executor or _shared_executor()
+
+    def timed(self, func, timeout: tuple):
+        """Result of `func(timeout)`, its latency is recorded."""
+        started = time.monotonic()
+        result = func(timeout)
+        self.record(time.monotonic() - started)
+        return result
+
+    def call(self, func):
+        """Result of `func(timeout)`, hedged if it is slower than usual."""
+        with self._lock:
+            self._tokens = min(self._tokens + self.budget, self._max_tokens)
+        delay = self.delay()
+        if delay is None:
+            return self.timed(func, deadlines.timeout())
+        executor = self.executor_for()
+        first = executor.submit(self.timed, func, deadlines.timeout())
+        if wait([first], timeout=delay).done:
+            return first.result()
+        hedge = self._hedge(executor, func)
+        if hedge is None:
+            return first.result()
+        return self._first_answer(first, hedge)
+
+    def _hedge(self, executor: ThreadPoolExecutor, func):
+        if not self.take_budget():
+            return None
+        try:
+            timeout = deadlines.timeout()
+        except deadlines.DeadlineExceeded:
+            return None
+        metrics.HEDGED_REQUESTS.inc(target=self.name, result='sent')
+        logger.info(f'{self.name} is slow, hedging.')
+        return executor.submit(self.timed, func, timeout)
+
+    def _first_answer(self, first, hedge):
+        pending = {first, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            answered = [
+                future for future in done if future.exception() is None
+            ]
+            if answered:
+                winner = hedge if hedge in answered else first
+                for future in {first, hedge} - {winner}:
+                    future.add_done_callback(_close)
+                if winner is hedge:
+                    metrics.HEDGED_REQUESTS.inc(target=self.name, result='won')
+                return winner.result()
+        return first.result()
+
+
+_executor = None
+_hedgers = {}
+_lock = threading.Lock()
+
+
+def _shared_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                HEDGE_WORKERS, thread_name_prefix='hedge'
+            )
+        return _executor
+
+
+def hedger_for(endpoint: str) -> Hedger:
+    """Hedger of the endpoint, latencies are shared by all tenants."""
+    with _lock:
+        hedger = _hedgers.get(endpoint)
+        if hedger is None:
+            hedger = _hedgers[endpoint] = Hedger(endpoint)
+        return hedger
@@ -0,0 +1,153 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import (QueueHandler, QueueListener,
+                              RotatingFileHandler, TimedRotatingFileHandler)
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FILE = os.getenv('LOG_FILE', 'runtime_log.log')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_STDOUT = os.getenv('LOG_STDOUT', 'true').lower() in ('1', 'true')
+LOG_ROTATE_BYTES = int(os.getenv('LOG_ROTATE_BYTES', 10 * 1024 * 1024))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_SAMPLE_WINDOW = float(os.getenv('LOG_SAMPLE_WINDOW', 60))
+
+TEXT_FORMAT = '%(asctime)s; %(levelname)s: %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_listener = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as JSON lines."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Renders the record as one JSON object."""
+        data = {
+            'time': self.formatTime(record, DATE_FORMAT),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Lets the same message through once per `window` seconds.
+    The next message that passes tells how many repeats were dropped.
+    """
+
+    MAX_TRACKED = 1000
+
+    def __init__(self, window: float = LOG_SAMPLE_WINDOW) -> None:
+        """Sets the sampling window in seconds."""
+        super().__init__()
+        self.window = window
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decides if the record is logged."""
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        now = time.monotonic()
+        with self._lock:
+            passed_at, suppressed = self._seen.get(key, (None, 0))
+            if passed_at is not None and now - passed_at < self.window:
+                self._seen[key] = (passed_at, suppressed + 1)
+                return False
+            if len(self._seen) >= self.MAX_TRACKED:
+                self._forget(now)
+            self._seen[key] = (now, 0)
+        if suppressed:
+            record.msg = f'{message} ({suppressed} similar messages dropped)'
+            record.args = None
+        return True
+
+    def _forget(self, now: float) -> None:
+        for key, (passed_at, _) in list(self._seen.items()):
+            if now - passed_at >= self.window:
+                del self._seen[key]
+
+
+def make_formatter(log_format: str = LOG_FORMAT) -> logging.Formatter:
+    """Text formatter of the bot or JSON lines formatter."""
+    if log_format == 'json':
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+
+
+def make_file_handler(path: str = LOG_FILE,
+                      rotate_when: str = LOG_ROTATE_WHEN,
+                      rotate_bytes: int = LOG_ROTATE_BYTES,
+                      backup_count: int = LOG_BACKUP_COUNT
+                      ) -> logging.Handler:
+    """Log file handler rotated by time or by size."""
+    if rotate_when:
+        return TimedRotatingFileHandler(
+            path, when=rotate_when, backupCount=backup_count,
+            encoding='utf-8'
+        )
+    return RotatingFileHandler(
+        path, maxBytes=rotate_bytes, backupCount=backup_count,
+        encoding='utf-8'
+    )
+
+
+def setup_logging(level: str = LOG_LEVEL, path: str = LOG_FILE,
+                  log_format: str = LOG_FORMAT, stdout: bool = LOG_STDOUT,
+                  sample_window: float = LOG_SAMPLE_WINDOW) -> QueueListener:
+    """Routes records of the root logger through a queue.
+    Callers only put records to the queue, file and console output
+    happens in the listener thread. Calling it twice is harmless.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+        formatter = make_formatter(log_format)
+        handlers = []
+        if path:
+            handlers.append(make_file_handler(path))
+        if stdout:
+            handlers.append(logging.StreamHandler(stream=sys.stdout))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        records = queue.SimpleQueue()
+        queue_handler = QueueHandler(records)
+        if sample_window > 0:
+            queue_handler.addFilter(SamplingFilter(sample_window))
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+        _listener = QueueListener(
+            records, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def stop_logging() -> None:
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, QueueHandler):
+                root.removeHandler(handler)
+        _listener = None
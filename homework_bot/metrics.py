@@ -0,0 +1,320 @@
+import functools
+import os
+import threading
+import time
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30
+)
+SLEEP_BUCKETS = (1, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+
+def _escape(value) -> str:
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base of the metrics, keeps children by label values."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str,
+                 labels: tuple = ()) -> None:
+        """Declares the metric with the label names."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labels):
+            raise ValueError(
+                f'{self.name} expects labels {self.labels}, '
+                f'got {tuple(labels)}'
+            )
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self) -> list:
+        """Lines of the text exposition format."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key: tuple, value) -> list:
+        return [
+            f'{self.name}{_format_labels(self.labels, key)} '
+            f'{_format_number(value)}'
+        ]
+
+
+class Counter(Metric):
+    """Value that only goes up."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increases the counter of the label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value of the label values."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        """Sets the gauge of the label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (),
+                 buckets: tuple = LATENCY_BUCKETS) -> None:
+        """Declares the histogram with its bucket bounds."""
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels) -> None:
+        """Adds the value to the distribution of the label values."""
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = {'buckets': [0] * len(self.buckets), 'sum': 0.0}
+                self._values[key] = data
+            for number, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data['buckets'][number] += 1
+            data['sum'] += value
+
+    def count(self, **labels) -> int:
+        """Number of observations of the label values."""
+        with self._lock:
+            data = self._values.get(self._key(labels))
+            return data['buckets'][-1] if data else 0
+
+    def _render_value(self, key: tuple, value) -> list:
+        lines = []
+        for bound, count in zip(self.buckets, value['buckets']):
+            labels = _format_labels(
+                self.labels, key, f'le="{_format_number(bound)}"'
+            )
+            lines.append(f'{self.name}_bucket{labels} {count}')
+        labels = _format_labels(self.labels, key)
+        lines.append(f'{self.name}_sum{labels} {value["sum"]!r}')
+        lines.append(f'{self.name}_count{labels} {value["buckets"][-1]}')
+        return lines
+
+
+class Registry:
+    """Set of metrics exposed together."""
+
+    def __init__(self) -> None:
+        """Starts with no metrics."""
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Adds the metric, names must be unique."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} already exists.')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        """Declares and registers a counter."""
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        """Declares and registers a gauge."""
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        """Declares and registers a histogram."""
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+API_REQUEST_SECONDS = registry.histogram(
+    'homework_api_request_seconds',
+    'Latency of Practicum API requests by HTTP status.', ('status',)
+)
+VALIDATION_FAILURES = registry.counter(
+    'homework_validation_failures_total',
+    'Failures of API answer checks by stage and error type.',
+    ('stage', 'error')
+)
+TELEGRAM_REQUEST_SECONDS = registry.histogram(
+    'homework_telegram_request_seconds',
+    'Latency of Bot API calls made by the send queue.'
+)
+TELEGRAM_FAILURES = registry.counter(
+    'homework_telegram_failures_total',
+    'Failed Bot API calls of the send queue by error type.', ('error',)
+)
+SEND_QUEUE_DEPTH = registry.gauge(
+    'homework_send_queue_depth', 'Messages waiting in the send queue.'
+)
+OUTBOX_PENDING = registry.gauge(
+    'homework_outbox_pending', 'Notifications in the outbox not yet sent.'
+)
+OUTBOX_DELIVERIES = registry.counter(
+    'homework_outbox_deliveries_total',
+    'Outbox delivery attempts by result: sent, retry or dropped.',
+    ('result',)
+)
+TIMEOUTS = registry.counter(
+    'homework_timeouts_total',
+    'Outbound calls that ran out of time by target.', ('target',)
+)
+HEDGED_REQUESTS = registry.counter(
+    'homework_hedged_requests_total',
+    'Hedged requests sent and hedges that answered first.',
+    ('target', 'result')
+)
+SINK_SECONDS = registry.histogram(
+    'homework_sink_seconds', 'Latency of notification sinks.', ('sink',)
+)
+SINK_FAILURES = registry.counter(
+    'homework_sink_failures_total',
+    'Failed sink deliveries by sink and error type.', ('sink', 'error')
+)
+SINK_DROPPED = registry.counter(
+    'homework_sink_dropped_total',
+    'Notifications dropped because the sink fell behind.', ('sink',)
+)
+CYCLE_SECONDS = registry.histogram(
+    'homework_cycle_seconds', 'Duration of poll cycles.'
+)
+SLEEP_SECONDS = registry.histogram(
+    'homework_sleep_seconds', 'Time slept between polls.',
+    buckets=SLEEP_BUCKETS
+)
+TRACKED_HOMEWORKS = registry.gauge(
+    'homework_tracked_homeworks', 'Homeworks with a known status.'
+)
+BREAKER_STATE = registry.gauge(
+    'homework_breaker_state',
+    'Circuit breaker state: 0 closed, 1 open, 2 half-open.', ('breaker',)
+)
+BREAKER_TRANSITIONS = registry.counter(
+    'homework_breaker_transitions_total',
+    'Circuit breaker transitions by the new state.', ('breaker', 'state')
+)
+
+
+def count_failures(stage: str):
+    """Decorator counting exceptions of the function by type."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                VALIDATION_FAILURES.inc(
+                    stage=stage, error=type(error).__name__
+                )
+                raise
+        return wrapper
+    return decorator
+
+
+class Timer:
+    """Context manager measuring elapsed seconds."""
+
+    def __enter__(self) -> 'Timer':
+        """Starts the timer."""
+        self.started = time.perf_counter()
+        self.elapsed = None
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stops the timer."""
+        self.elapsed = time.perf_counter() - self.started
+
+
+def start_metrics_server(port: int = None, host: str = None):
+    """Serves /metrics in a background thread.
+    Port and host default to METRICS_PORT and METRICS_HOST, they are
+    read here and not on import because .env is loaded by `init`.
+    Returns the server or None if no port is configured.
+    """
+    port = port or os.getenv('METRICS_PORT')
+    host = host or os.getenv('METRICS_HOST', '127.0.0.1')
+    if not port:
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header(
+                'Content-Type', 'text/plain; version=0.0.4; charset=utf-8'
+            )
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name='metrics-server', daemon=True
+    ).start()
+    return server
@@ -0,0 +1,163 @@
+from collections import namedtuple
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+
+NOT_A_DICT = 'API answer is not a valid.'
+NO_HOMEWORKS = 'Somehow there is no key named "homeworks" in the data.'
+NOT_A_LIST = 'List of homeworks is not actually a list!'
+HOMEWORK_NOT_A_DICT = 'Homework is not a dict.'
+NO_NAME = 'Cannot access to homework_name via key word "homework_name".'
+NO_STATUS = 'Cannot access to status via key word "status".'
+UNKNOWN_STATUS = 'There is not valid value of homework status.'
+
+
+class Status(str, Enum):
+    """Review status of a homework.
+    Members are shared by every record, so a million homeworks keep
+    three status objects. They compare and hash equal to the API codes.
+    """
+
+    APPROVED = 'approved'
+    REVIEWING = 'reviewing'
+    REJECTED = 'rejected'
+
+    def __str__(self) -> str:
+        """The API code, also used in keys kept on disk."""
+        return self.value
+
+
+class Homework(namedtuple('Homework', ['name', 'status', 'id'])):
+    """Checked homework from the API answer.
+    A tuple without per-instance dict: only the fields the bot uses
+    are kept, the rest of the API dict is dropped after validation.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, name: str, status: Status, id: int = None):
+        """Record of the homework, `id` is optional."""
+        return super().__new__(cls, name, status, id)
+
+    @property
+    def key_id(self):
+        """Identity of the homework, its name if the API sent no id."""
+        return self.name if self.id is None else self.id
+
+
+class StatusEvent(namedtuple('StatusEvent', ['key', 'homework'])):
+    """Status change to notify about.
+    The message text is not kept, it is rendered only when sent.
+    """
+
+    __slots__ = ()
+
+
+@dataclass(frozen=True)
+class Answer:
+    """Checked API answer.
+    `errors` keeps (path, exception) pairs of the homeworks skipped by
+    a partial validation.
+    """
+
+    homeworks: tuple
+    current_date: int = None
+    errors: tuple = ()
+
+
+class ValidationError(Exception):
+    """Every problem found in the API answer.
+    Raised as AnswerTypeError or AnswerKeyError after the type of the
+    first problem, so it is caught like the errors of the old checks.
+    """
+
+    def __init__(self, errors: list) -> None:
+        """Keeps (path, exception) pairs in `errors`."""
+        self.errors = errors
+        if len(errors) == 1:
+            message = str(errors[0][1].args[0])
+        else:
+            message = f'{len(errors)} problems in API answer: ' + '; '.join(
+                f'{path}: {error.args[0]}' for path, error in errors
+            )
+        super().__init__(message)
+
+    @classmethod
+    def of(cls, errors: list) -> 'ValidationError':
+        """Error typed after the first problem, key or type error."""
+        if isinstance(errors[0][1], KeyError):
+            return AnswerKeyError(errors)
+        return AnswerTypeError(errors)
+
+    @classmethod
+    def raise_for(cls, errors: list) -> None:
+        """Raises the errors if there are any."""
+        if errors:
+            raise cls.of(errors)
+
+
+class AnswerTypeError(ValidationError, TypeError):
+    """API answer has a value of a wrong type."""
+
+
+class AnswerKeyError(ValidationError, KeyError):
+    """API answer misses a key or has an unknown status."""
+
+
+class AnswerValidator:
+    """Checks the whole API answer in one pass.
+    The schema is compiled once: required homework keys with their
+    errors and the set of known statuses. Every problem is collected,
+    homeworks are returned as Homework records.
+    """
+
+    REQUIRED = (('homework_name', NO_NAME), ('status', NO_STATUS))
+
+    def __init__(self, statuses) -> None:
+        """Compiles the schema, statuses must be Status codes."""
+        self.statuses = {code: Status(code) for code in statuses}
+
+    def __call__(self, answer: dict, partial: bool = False) -> Answer:
+        """Typed answer or ValidationError with every problem found.
+        With `partial` only a broken answer raises, invalid homeworks
+        are skipped and kept in `Answer.errors`.
+        """
+        if not isinstance(answer, dict):
+            ValidationError.raise_for([('', TypeError(NOT_A_DICT))])
+        if 'homeworks' not in answer:
+            ValidationError.raise_for([('', KeyError(NO_HOMEWORKS))])
+        items = answer['homeworks']
+        if not isinstance(items, list):
+            ValidationError.raise_for([('homeworks', TypeError(NOT_A_LIST))])
+        errors = []
+        homeworks = []
+        for index, item in enumerate(items):
+            path = f'homeworks[{index}]'
+            if not isinstance(item, dict):
+                errors.append((path, TypeError(HOMEWORK_NOT_A_DICT)))
+                continue
+            missing = [
+                (path, KeyError(message))
+                for key, message in self.REQUIRED if key not in item
+            ]
+            if missing:
+                errors.extend(missing)
+                continue
+            status = item['status']
+            if not isinstance(status, str) or status not in self.statuses:
+                errors.append((path, KeyError(UNKNOWN_STATUS)))
+                continue
+            homeworks.append(Homework(
+                item['homework_name'], self.statuses[status], item.get('id')
+            ))
+        if not partial:
+            ValidationError.raise_for(errors)
+        return Answer(
+            tuple(homeworks), answer.get('current_date'), tuple(errors)
+        )
+
+
+@lru_cache(maxsize=None)
+def compile_validator(statuses: tuple) -> AnswerValidator:
+    """Validator for the statuses, compiled once per set of statuses."""
+    return AnswerValidator(statuses)
@@ -0,0 +1,214 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+import telegram
+
+from homework_bot import metrics
+from homework_bot.deadlines import TELEGRAM_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+SEND_WORKERS = int(os.getenv('SEND_WORKERS', 4))
+SEND_MAX_RETRIES = int(os.getenv('SEND_MAX_RETRIES', 5))
+SEND_BACKOFF = float(os.getenv('SEND_BACKOFF', 1))
+
+_STOP = object()
+
+
+class TokenBucket:
+    """Token bucket that hands out send slots at `rate` per second."""
+
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        """Starts with a full bucket."""
+        if rate <= 0:
+            raise ValueError('Rate must be a positive number.')
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Blocks until a token is available."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class SendQueue:
+    """Delivers Telegram messages from background workers.
+    Messages of one chat always go through the same worker, so their
+    order is kept. Global and per-chat rates are enforced with token
+    buckets, `RetryAfter` is honoured and network errors are retried
+    with exponential backoff. `send_message` has the bot's call shape,
+    so the queue can stand in for the bot in the poll pipeline.
+    """
+
+    def __init__(self, bot: telegram.Bot, workers: int = SEND_WORKERS,
+                 global_rate: float = TELEGRAM_GLOBAL_RATE,
+                 chat_rate: float = TELEGRAM_CHAT_RATE,
+                 max_retries: int = SEND_MAX_RETRIES,
+                 backoff: float = SEND_BACKOFF) -> None:
+        """Prepares worker queues, call `start` to run the workers."""
+        if workers < 1:
+            raise ValueError('At least one worker is needed.')
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_buckets = {}
+        self._queues = [queue.Queue() for _ in range(workers)]
+        self._threads = []
+        self._lock = threading.Lock()
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def start(self) -> 'SendQueue':
+        """Starts the worker threads."""
+        for number, messages in enumerate(self._queues):
+            thread = threading.Thread(
+                target=self._work, args=(messages,),
+                name=f'send-queue-{number}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def send_message(self, chat_id: str = None, text: str = None,
+                     on_done=None, **kwargs) -> None:
+        """Queues the message, never waits for Telegram.
+        `on_done(sent)` is called by a worker once the message is sent
+        or given up on.
+        """
+        worker = hash(str(chat_id)) % len(self._queues)
+        self._queues[worker].put(
+            (chat_id, text, kwargs, time.monotonic(), on_done)
+        )
+        metrics.SEND_QUEUE_DEPTH.set(self._depth())
+
+    def join(self) -> None:
+        """Waits until every queued message is processed."""
+        for messages in self._queues:
+            messages.join()
+
+    def stop(self) -> None:
+        """Delivers what is queued and stops the workers."""
+        for messages in self._queues:
+            messages.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def stats(self) -> dict:
+        """Queue depth, delivery counters and send latency in seconds."""
+        with self._lock:
+            sent = self._sent
+            return {
+                'depth': self._depth(),
+                'sent': sent,
+                'failed': self._failed,
+                'retried': self._retried,
+                'latency_avg': self._latency_total / sent if sent else 0.0,
+                'latency_max': self._latency_max,
+            }
+
+    def _depth(self) -> int:
+        return sum(messages.qsize() for messages in self._queues)
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = TokenBucket(self.chat_rate, capacity=1)
+                self._chat_buckets[chat_id] = bucket
+            return bucket
+
+    def _work(self, messages: queue.Queue) -> None:
+        while True:
+            item = messages.get()
+            metrics.SEND_QUEUE_DEPTH.set(self._depth())
+            try:
+                if item is _STOP:
+                    return
+                *message, on_done = item
+                sent = self._deliver(*message)
+                if on_done is not None:
+                    on_done(sent)
+            except Exception as error:
+                logger.error(f'Send queue worker failed: {error}')
+            finally:
+                messages.task_done()
+
+    def _deliver(self, chat_id: str, text: str, kwargs: dict,
+                 queued_at: float) -> bool:
+        attempt = 0
+        while True:
+            self._chat_bucket(chat_id).acquire()
+            self._global_bucket.acquire()
+            try:
+                with metrics.Timer() as timer:
+                    self.bot.send_message(
+                        chat_id=chat_id, text=text,
+                        **{'timeout': TELEGRAM_TIMEOUT, **kwargs}
+                    )
+                metrics.TELEGRAM_REQUEST_SECONDS.observe(timer.elapsed)
+            except telegram.error.RetryAfter as error:
+                metrics.TELEGRAM_FAILURES.inc(error=type(error).__name__)
+                delay = error.retry_after
+                logger.warning(f'Telegram asks to wait {delay} s.')
+            except telegram.error.NetworkError as error:
+                metrics.TELEGRAM_FAILURES.inc(error=type(error).__name__)
+                if isinstance(error, telegram.error.TimedOut):
+                    metrics.TIMEOUTS.inc(target='telegram')
+                delay = self.backoff * 2 ** attempt * random.uniform(1, 1.5)
+                logger.warning(f'Message is not sent, will retry: {error}')
+            except Exception as error:
+                metrics.TELEGRAM_FAILURES.inc(error=type(error).__name__)
+                logger.error(f'Message cannot be sent: {error}')
+                self._count(failed=True)
+                return False
+            else:
+                latency = time.monotonic() - queued_at
+                self._count(latency=latency)
+                return True
+            attempt += 1
+            if attempt > self.max_retries:
+                logger.error('Message cannot be sent, retries are over.')
+                self._count(failed=True)
+                return False
+            with self._lock:
+                self._retried += 1
+            time.sleep(delay)
+
+    def _count(self, latency: float = None, failed: bool = False) -> None:
+        with self._lock:
+            if failed:
+                self._failed += 1
+                return
+            self._sent += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
@@ -0,0 +1,296 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from homework_bot import metrics
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DB = os.getenv('OUTBOX_DB', 'outbox.db')
+OUTBOX_INTERVAL = float(os.getenv('OUTBOX_INTERVAL', 0.5))
+OUTBOX_BATCH = int(os.getenv('OUTBOX_BATCH', 100))
+OUTBOX_LEASE = float(os.getenv('OUTBOX_LEASE', 300))
+OUTBOX_CLAIM_TIMEOUT = float(os.getenv('OUTBOX_CLAIM_TIMEOUT', 600))
+OUTBOX_BACKOFF = float(os.getenv('OUTBOX_BACKOFF', 5))
+OUTBOX_MAX_BACKOFF = float(os.getenv('OUTBOX_MAX_BACKOFF', 60 * 60))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 100))
+OUTBOX_COMPACT_INTERVAL = float(os.getenv('OUTBOX_COMPACT_INTERVAL', 60))
+
+
+class Outbox:
+    """Keeps notifications in SQLite until Telegram accepts them.
+    `send_message` has the bot's call shape and only buffers the
+    message, a background thread writes the buffer in one transaction,
+    claims due entries for `lease` seconds and hands them to the
+    sender. At most `batch` entries are with the sender at a time and
+    their leases are renewed until the sender reports back, so a
+    lagging sender never gets an entry twice. A sender that reports
+    nothing for `claim_timeout` seconds loses the renewals, and an
+    entry it holds that long goes back to pending. Entries are
+    acknowledged when the sender reports success, failed ones are
+    retried with exponential backoff and acknowledged entries are
+    deleted by periodic compaction. A message is sent at least once,
+    it may be sent again if the process dies between the delivery and
+    the acknowledgement.
+    """
+
+    def __init__(self, sender, path: str = None,
+                 interval: float = OUTBOX_INTERVAL,
+                 batch: int = OUTBOX_BATCH, lease: float = OUTBOX_LEASE,
+                 claim_timeout: float = OUTBOX_CLAIM_TIMEOUT,
+                 backoff: float = OUTBOX_BACKOFF,
+                 max_backoff: float = OUTBOX_MAX_BACKOFF,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 compact_interval: float = OUTBOX_COMPACT_INTERVAL) -> None:
+        """Opens the database, in memory if `path` is not given.
+        `sender` is a SendQueue or anything with its `send_message`
+        and `join`.
+        """
+        self.sender = sender
+        self.interval = interval
+        self.batch = batch
+        self.lease = lease
+        self.claim_timeout = claim_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.compact_interval = compact_interval
+        self._buffer = []
+        self._results = deque()
+        self._in_flight = {}
+        self._progress_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._compacted_at = time.monotonic()
+        self._db = sqlite3.connect(
+            path or ':memory:', timeout=30, isolation_level=None,
+            check_same_thread=False
+        )
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id, text TEXT, '
+            'options TEXT, created_at REAL, attempts INTEGER DEFAULT 0, '
+            'due_at REAL, delivered_at REAL)'
+        )
+        self._db.execute(
+            'CREATE INDEX IF NOT EXISTS outbox_due '
+            'ON outbox (delivered_at, due_at)'
+        )
+
+    def start(self) -> 'Outbox':
+        """Starts the delivery thread."""
+        self._thread = threading.Thread(
+            target=self._run, name='outbox', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def send_message(self, chat_id: str = None, text: str = None,
+                     **kwargs) -> None:
+        """Buffers the message, it is written with the next batch."""
+        with self._lock:
+            self._buffer.append((chat_id, text, kwargs))
+
+    def flush(self) -> int:
+        """Writes buffered messages in one transaction."""
+        with self._lock:
+            messages, self._buffer = self._buffer, []
+            if not messages:
+                return 0
+            now = time.time()
+            self._transaction(lambda: self._db.executemany(
+                'INSERT INTO outbox (chat_id, text, options, created_at, '
+                'due_at) VALUES (?, ?, ?, ?, ?)',
+                [(chat_id, text, json.dumps(options), now, now)
+                 for chat_id, text, options in messages]
+            ))
+        return len(messages)
+
+    def drain(self) -> int:
+        """Claims due entries the sender has room for and hands them over."""
+        now = time.time()
+        with self._lock:
+            rows = self._transaction(lambda: self._claim(now))
+            claimed_at = time.monotonic()
+            if not self._in_flight:
+                self._progress_at = claimed_at
+            self._in_flight.update((row[0], claimed_at) for row in rows)
+        for entry_id, chat_id, text, options in rows:
+            self.sender.send_message(
+                chat_id=chat_id, text=text,
+                on_done=partial(self._done, entry_id, claimed_at),
+                **json.loads(options)
+            )
+        return len(rows)
+
+    def _claim(self, now: float) -> list:
+        room = self.batch - len(self._in_flight)
+        if room <= 0:
+            return []
+        rows = [
+            row for row in self._db.execute(
+                'SELECT id, chat_id, text, options FROM outbox '
+                'WHERE delivered_at IS NULL AND due_at <= ? '
+                'ORDER BY id LIMIT ?',
+                (now, room + len(self._in_flight))
+            ) if row[0] not in self._in_flight
+        ][:room]
+        self._db.executemany(
+            'UPDATE outbox SET due_at = ? WHERE id = ?',
+            [(now + self.lease, row[0]) for row in rows]
+        )
+        return rows
+
+    def _done(self, entry_id: int, claimed_at: float, sent: bool) -> None:
+        self._results.append((entry_id, claimed_at, sent))
+
+    def renew(self) -> None:
+        """Extends leases of entries still waiting in the sender.
+        Entries held longer than `claim_timeout` go back to pending, the
+        rest are renewed only while the sender keeps reporting back.
+        """
+        with self._lock:
+            if not self._in_flight:
+                return
+            now = time.monotonic()
+            expired = [
+                entry_id for entry_id, claimed_at in self._in_flight.items()
+                if now - claimed_at >= self.claim_timeout
+            ]
+            for entry_id in expired:
+                del self._in_flight[entry_id]
+            if expired:
+                logger.warning(
+                    f'{len(expired)} notifications are not reported by the '
+                    f'sender in {self.claim_timeout} s, retrying them.'
+                )
+            renewed = []
+            if now - self._progress_at < self.claim_timeout:
+                renewed = list(self._in_flight)
+            self._transaction(lambda: self._extend(expired, renewed))
+
+    def _extend(self, expired: list, renewed: list) -> None:
+        now = time.time()
+        self._db.executemany(
+            'UPDATE outbox SET due_at = ? WHERE id = ?',
+            [(now, entry_id) for entry_id in expired]
+            + [(now + self.lease, entry_id) for entry_id in renewed]
+        )
+
+    def acknowledge(self) -> int:
+        """Records outcomes reported by the sender since the last call."""
+        reported = []
+        while self._results:
+            reported.append(self._results.popleft())
+        if not reported:
+            return 0
+        with self._lock:
+            self._progress_at = time.monotonic()
+            results = [
+                (entry_id, sent) for entry_id, claimed_at, sent in reported
+                if self._in_flight.get(entry_id) == claimed_at or sent
+            ]
+            for entry_id, claimed_at, _ in reported:
+                if self._in_flight.get(entry_id) == claimed_at:
+                    del self._in_flight[entry_id]
+            self._transaction(lambda: self._record(results, time.time()))
+        return len(reported)
+
+    def _record(self, results: list, now: float) -> None:
+        for entry_id, sent in results:
+            if sent:
+                self._db.execute(
+                    'UPDATE outbox SET delivered_at = ? WHERE id = ?',
+                    (now, entry_id)
+                )
+                metrics.OUTBOX_DELIVERIES.inc(result='sent')
+                continue
+            attempts = self._db.execute(
+                'SELECT attempts FROM outbox WHERE id = ?', (entry_id,)
+            ).fetchone()[0] + 1
+            if self.max_attempts and attempts >= self.max_attempts:
+                logger.error(
+                    f'Notification {entry_id} is dropped after '
+                    f'{attempts} attempts.'
+                )
+                self._db.execute(
+                    'DELETE FROM outbox WHERE id = ?', (entry_id,)
+                )
+                metrics.OUTBOX_DELIVERIES.inc(result='dropped')
+                continue
+            delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+            self._db.execute(
+                'UPDATE outbox SET attempts = ?, due_at = ? WHERE id = ?',
+                (attempts, now + delay, entry_id)
+            )
+            metrics.OUTBOX_DELIVERIES.inc(result='retry')
+
+    def compact(self) -> int:
+        """Deletes acknowledged entries and truncates the WAL file."""
+        with self._lock:
+            deleted = self._transaction(lambda: self._db.execute(
+                'DELETE FROM outbox WHERE delivered_at IS NOT NULL'
+            ).rowcount)
+            self._db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self._compacted_at = time.monotonic()
+        return deleted
+
+    def pending(self) -> int:
+        """Number of entries not yet delivered."""
+        with self._lock:
+            return self._db.execute(
+                'SELECT COUNT(*) FROM outbox WHERE delivered_at IS NULL'
+            ).fetchone()[0]
+
+    def _transaction(self, work):
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            result = work()
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+        self._db.execute('COMMIT')
+        return result
+
+    def tick(self) -> None:
+        """One round of the delivery thread."""
+        self.flush()
+        self.acknowledge()
+        self.renew()
+        self.drain()
+        if time.monotonic() - self._compacted_at >= self.compact_interval:
+            self.compact()
+        metrics.OUTBOX_PENDING.set(self.pending())
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.tick()
+            except sqlite3.Error as error:
+                logger.error(f'Outbox delivery failed: {error}')
+
+    def close(self) -> None:
+        """Delivers what is due, records the outcomes and closes.
+        Entries that are not sent stay in the database for the next run.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        while self.drain():
+            self.sender.join()
+            self.acknowledge()
+        self.sender.join()
+        self.acknowledge()
+        self.compact()
+        metrics.OUTBOX_PENDING.set(self.pending())
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,251 @@
+import argparse
+import glob
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_CYCLES = int(os.getenv('PROFILE_CYCLES', 0))
+PROFILE_SIGNAL_CYCLES = int(os.getenv('PROFILE_SIGNAL_CYCLES', 5))
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'cpu,memory')
+PROFILE_FRAMES = int(os.getenv('PROFILE_FRAMES', 10))
+
+STATS_SUFFIX = '.pstats'
+SNAPSHOT_START_SUFFIX = '.start.tracemalloc'
+SNAPSHOT_END_SUFFIX = '.end.tracemalloc'
+
+
+class Profiler:
+    """Profiles a given number of poll cycles on demand.
+    Requested with PROFILE_CYCLES on start or with a signal at runtime.
+    CPU profile goes to a pstats file, memory to two tracemalloc
+    snapshots taken around the profiled cycles. Work the cycle hands to
+    other threads is profiled when it goes through `run`, one profile
+    per thread merged into the same file. Idle cycles cost one check
+    of a counter.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR,
+                 mode: str = PROFILE_MODE,
+                 frames: int = PROFILE_FRAMES) -> None:
+        """Profiles nothing until `request` is called."""
+        modes = {part.strip() for part in mode.split(',') if part.strip()}
+        unknown = modes - {'cpu', 'memory'}
+        if unknown:
+            raise ValueError(f'Unknown profile modes: {sorted(unknown)}')
+        self.directory = directory
+        self.cpu = 'cpu' in modes
+        self.memory = 'memory' in modes
+        self.frames = frames
+        self.written = []
+        self._pending = 0
+        self._left = 0
+        self._lock = threading.Lock()
+        self._profile = None
+        self._thread_profiles = []
+        self._local = threading.local()
+        self._start_snapshot = None
+        self._started_tracing = False
+
+    def request(self, cycles: int) -> None:
+        """Profiles the next `cycles` cycles."""
+        with self._lock:
+            self._pending = max(self._pending, cycles)
+
+    def install_signal_handler(self, signum: int = None,
+                               cycles: int = PROFILE_SIGNAL_CYCLES) -> None:
+        """Requests `cycles` profiled cycles on the signal, SIGUSR1 by default.
+        Works only in the main thread, does nothing without SIGUSR1.
+        """
+        if signum is None:
+            signum = getattr(signal, 'SIGUSR1', None)
+        if signum is None:
+            return
+
+        def handler(received, frame):
+            logger.info(f'Profiling of {cycles} cycles is requested.')
+            self.request(cycles)
+
+        signal.signal(signum, handler)
+
+    @contextmanager
+    def cycle(self):
+        """Wraps one cycle, profiling it if it was requested."""
+        if not self._left:
+            with self._lock:
+                pending, self._pending = self._pending, 0
+            if not pending:
+                yield
+                return
+            self._start(pending)
+        if self._profile is not None:
+            self._profile.enable()
+        try:
+            yield
+        finally:
+            if self._profile is not None:
+                self._profile.disable()
+            self._left -= 1
+            if not self._left:
+                self._finish()
+
+    def run(self, func, *args):
+        """Calls `func(*args)`, profiled if a profiled cycle is running.
+        Meant for tasks the cycle runs on other threads. Where the
+        profile of the cycle already sees every thread, as cProfile does
+        since Python 3.12, the task is left to it. Profiling errors
+        never reach `func`'s caller.
+        """
+        profile = self._enable_thread_profile()
+        try:
+            return func(*args)
+        finally:
+            if profile is not None:
+                profile.disable()
+
+    def _enable_thread_profile(self):
+        try:
+            profile = self._thread_profile()
+            if profile is not None:
+                profile.enable()
+            return profile
+        except Exception as error:
+            logger.debug(f'No own profile for the thread: {error}')
+            self._local.profile = None
+            return None
+
+    def _thread_profile(self):
+        owner = self._profile
+        if owner is None:
+            return None
+        if getattr(self._local, 'owner', None) is not owner:
+            import cProfile
+
+            self._local.owner = owner
+            self._local.profile = None
+            profile = cProfile.Profile()
+            profile.enable()
+            profile.disable()
+            self._local.profile = profile
+            with self._lock:
+                self._thread_profiles.append(profile)
+        return self._local.profile
+
+    def _start(self, cycles: int) -> None:
+        self._left = cycles
+        if self.cpu:
+            import cProfile
+
+            self._profile = cProfile.Profile()
+        if self.memory:
+            import tracemalloc
+
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start(self.frames)
+            self._start_snapshot = tracemalloc.take_snapshot()
+        logger.info(f'Profiling of {cycles} cycles is started.')
+
+    def _dump_stats(self, path: str) -> None:
+        import pstats
+
+        with self._lock:
+            profiles, self._thread_profiles = self._thread_profiles, []
+            owner, self._profile = self._profile, None
+        stats = pstats.Stats(owner)
+        for profile in profiles:
+            profile.create_stats()
+            if profile.stats:
+                stats.add(profile)
+        stats.dump_stats(path)
+
+    def _finish(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        prefix = os.path.join(
+            self.directory,
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}'
+        )
+        if self._profile is not None:
+            self._dump_stats(prefix + STATS_SUFFIX)
+            self.written.append(prefix + STATS_SUFFIX)
+        if self._start_snapshot is not None:
+            import tracemalloc
+
+            self._start_snapshot.dump(prefix + SNAPSHOT_START_SUFFIX)
+            tracemalloc.take_snapshot().dump(prefix + SNAPSHOT_END_SUFFIX)
+            self.written.extend(
+                [prefix + SNAPSHOT_START_SUFFIX, prefix + SNAPSHOT_END_SUFFIX]
+            )
+            self._start_snapshot = None
+            if self._started_tracing:
+                tracemalloc.stop()
+        logger.info(f'Profiling is over, files are in {self.directory}.')
+
+
+def make_profiler(signals: bool = True) -> Profiler:
+    """Profiler armed for PROFILE_CYCLES cycles.
+    With `signals` SIGUSR1 requests PROFILE_SIGNAL_CYCLES more.
+    """
+    profiler = Profiler()
+    profiler.request(PROFILE_CYCLES)
+    if signals:
+        profiler.install_signal_handler()
+    return profiler
+
+
+def latest_profile(directory: str = PROFILE_DIR) -> str:
+    """Prefix of the newest profile in the directory or None."""
+    prefixes = {
+        path[:-len(suffix)]
+        for suffix in (STATS_SUFFIX, SNAPSHOT_END_SUFFIX)
+        for path in glob.glob(os.path.join(directory, '*' + suffix))
+    }
+    return max(prefixes, default=None)
+
+
+def report(prefix: str, top: int = 20, stream=None) -> None:
+    """Prints top functions and allocation sites of the profile."""
+    stream = stream or sys.stdout
+    if os.path.exists(prefix + STATS_SUFFIX):
+        import pstats
+
+        print(f'Top {top} functions by cumulative time:', file=stream)
+        stats = pstats.Stats(prefix + STATS_SUFFIX, stream=stream)
+        stats.sort_stats('cumulative').print_stats(top)
+    if os.path.exists(prefix + SNAPSHOT_END_SUFFIX):
+        import tracemalloc
+
+        end = tracemalloc.Snapshot.load(prefix + SNAPSHOT_END_SUFFIX)
+        start = tracemalloc.Snapshot.load(prefix + SNAPSHOT_START_SUFFIX)
+        print(f'Top {top} allocation sites by growth:', file=stream)
+        for stat in end.compare_to(start, 'lineno')[:top]:
+            print(stat, file=stream)
+
+
+def main() -> None:
+    """Prints the report of the profile from argv or the newest one."""
+    parser = argparse.ArgumentParser(
+        prog='python -m homework_bot.profiling',
+        description='Top functions and allocation sites of a profile.'
+    )
+    parser.add_argument(
+        'profile', nargs='?',
+        help='path prefix of the profile files, the newest by default'
+    )
+    parser.add_argument('--dir', default=PROFILE_DIR)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+    prefix = args.profile or latest_profile(args.dir)
+    if prefix is None:
+        raise SystemExit(f'No profiles in {args.dir}.')
+    report(prefix, args.top)
+
+
+if __name__ == '__main__':
+    main()
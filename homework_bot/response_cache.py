@@ -0,0 +1,90 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from http import HTTPStatus
+
+RESPONSE_CACHE_MAX_ENTRIES = int(
+    os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 100000)
+)
+
+_CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(\d+)')
+
+Fingerprint = namedtuple(
+    'Fingerprint', ['digest', 'etag', 'current_date', 'unchanged']
+)
+
+
+class ResponseCache:
+    """Recognises API answers that did not change since the last poll.
+    The raw body is hashed without decoding it. `current_date` changes
+    on every answer, so it is cut out of the body before hashing and
+    returned separately. ETag is sent back as If-None-Match when the
+    server provides it.
+    """
+
+    def __init__(self,
+                 max_entries: int = RESPONSE_CACHE_MAX_ENTRIES) -> None:
+        """Starts with an empty cache."""
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def headers(self, scope: str) -> dict:
+        """Conditional request headers for the scope (tenant)."""
+        with self._lock:
+            entry = self._entries.get(scope)
+        if entry is None or not entry.etag:
+            return {}
+        return {'If-None-Match': entry.etag}
+
+    def lookup(self, scope: str, response) -> Fingerprint:
+        """Fingerprints the response and compares it with the cache."""
+        headers = getattr(response, 'headers', None) or {}
+        etag = headers.get('ETag')
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            with self._lock:
+                self.hits += 1
+            return Fingerprint(None, etag, None, True)
+        content = getattr(response, 'content', None)
+        digest = None
+        current_date = None
+        if isinstance(content, bytes):
+            match = _CURRENT_DATE.search(content)
+            if match:
+                current_date = int(match.group(1))
+                content = content[:match.start()] + content[match.end():]
+            digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            entry = self._entries.get(scope)
+            unchanged = digest is not None and entry is not None and (
+                entry.digest == digest
+            )
+            if unchanged:
+                self.hits += 1
+                self._entries.move_to_end(scope)
+            else:
+                self.misses += 1
+        return Fingerprint(digest, etag, current_date, unchanged)
+
+    def store(self, scope: str, fingerprint: Fingerprint) -> None:
+        """Remembers the response once it was processed successfully."""
+        if fingerprint.digest is None:
+            return
+        with self._lock:
+            self._entries[scope] = fingerprint
+            self._entries.move_to_end(scope)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit and miss counters."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+            }
@@ -0,0 +1,108 @@
+import os
+import random
+import threading
+
+POLL_SCHEDULE = os.getenv('POLL_SCHEDULE', 'fixed')
+POLL_REVIEWING_INTERVAL = int(os.getenv('POLL_REVIEWING_INTERVAL', 60 * 2))
+POLL_IDLE_INTERVAL = int(os.getenv('POLL_IDLE_INTERVAL', 60 * 30))
+POLL_MAX_BACKOFF = int(os.getenv('POLL_MAX_BACKOFF', 60 * 30))
+
+ACTIVE_STATUSES = ('reviewing', 'rejected')
+
+
+class FixedSchedule:
+    """Sleeps the same time after every success and every error."""
+
+    def __init__(self, interval: float, error_interval: float) -> None:
+        """Remembers both intervals in seconds."""
+        self.interval = interval
+        self.error_interval = error_interval
+
+    def next_interval(self, state, success: bool) -> float:
+        """Seconds to wait before the next poll of the tenant."""
+        return self.interval if success else self.error_interval
+
+
+class AdaptiveSchedule(FixedSchedule):
+    """Adapts the poll interval to what is going on with the tenant.
+    A homework under review is polled often, a tenant without active
+    homeworks rarely. Errors are backed off exponentially with jitter.
+    """
+
+    def __init__(self, interval: float, error_interval: float,
+                 reviewing_interval: float = POLL_REVIEWING_INTERVAL,
+                 idle_interval: float = POLL_IDLE_INTERVAL,
+                 max_backoff: float = POLL_MAX_BACKOFF) -> None:
+        """Remembers intervals in seconds."""
+        super().__init__(interval, error_interval)
+        self.reviewing_interval = reviewing_interval
+        self.idle_interval = idle_interval
+        self.max_backoff = max_backoff
+
+    def next_interval(self, state, success: bool) -> float:
+        """Seconds to wait before the next poll of the tenant."""
+        if not success:
+            backoff = min(
+                self.max_backoff,
+                self.error_interval * 2 ** max(state.failures - 1, 0)
+            )
+            return backoff * random.uniform(0.5, 1)
+        if state.last_status == 'reviewing':
+            return self.reviewing_interval
+        if state.last_status not in ACTIVE_STATUSES:
+            return self.idle_interval
+        return self.interval
+
+
+SCHEDULES = {
+    'fixed': FixedSchedule,
+    'adaptive': AdaptiveSchedule,
+}
+
+
+def make_schedule(interval: float, error_interval: float,
+                  name: str = POLL_SCHEDULE) -> FixedSchedule:
+    """Creates the schedule policy registered under the name."""
+    try:
+        schedule_class = SCHEDULES[name]
+    except KeyError:
+        raise KeyError(
+            f'Unknown poll schedule "{name}", '
+            f'choose one of: {", ".join(SCHEDULES)}.'
+        )
+    return schedule_class(interval, error_interval)
+
+
+class IntervalStats:
+    """Statistics of the intervals the bot slept between polls."""
+
+    def __init__(self) -> None:
+        """Starts with no intervals recorded."""
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.last = None
+        self._lock = threading.Lock()
+
+    def record(self, interval: float) -> None:
+        """Adds the interval to the statistics."""
+        with self._lock:
+            self.count += 1
+            self.total += interval
+            self.last = interval
+            if self.minimum is None or interval < self.minimum:
+                self.minimum = interval
+            if self.maximum is None or interval > self.maximum:
+                self.maximum = interval
+
+    def as_dict(self) -> dict:
+        """Statistics as a plain dictionary."""
+        with self._lock:
+            return {
+                'count': self.count,
+                'mean': self.total / self.count if self.count else 0.0,
+                'min': self.minimum,
+                'max': self.maximum,
+                'last': self.last,
+            }
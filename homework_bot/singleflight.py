@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Merges concurrent calls with the same key into one call.
+    The first caller runs the function, callers arriving while it is
+    in flight wait for it and get the same result or exception.
+    """
+
+    def __init__(self) -> None:
+        """Starts with no calls in flight."""
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.merged = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """Result of `func(*args, **kwargs)`, shared by calls with the key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+                self.calls += 1
+            else:
+                self.merged += 1
+        if not leader:
+            return call.result()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as error:
+            call.set_exception(error)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> dict:
+        """Calls made and calls merged into them."""
+        with self._lock:
+            return {'calls': self.calls, 'merged': self.merged}
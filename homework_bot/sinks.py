@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from homework_bot import metrics
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHAT_IDS = [
+    chat_id.strip() for chat_id in os.getenv('NOTIFY_CHAT_IDS', '').split(',')
+    if chat_id.strip()
+]
+NOTIFY_WEBHOOK_URL = os.getenv('NOTIFY_WEBHOOK_URL')
+NOTIFY_JSONL = os.getenv('NOTIFY_JSONL')
+SINK_WORKERS = int(os.getenv('SINK_WORKERS', 4))
+SINK_TIMEOUT = float(os.getenv('SINK_TIMEOUT', 5))
+SINK_MAX_PENDING = int(os.getenv('SINK_MAX_PENDING', 1000))
+
+
+class Sink:
+    """Destination of notifications other than the tenant's chats.
+    `send` gets a dict with `text`, `chat_ids` of the tenant and
+    `time`, and should give up after `timeout` seconds.
+    """
+
+    name = 'sink'
+
+    def __init__(self, timeout: float = SINK_TIMEOUT) -> None:
+        """Remembers the timeout."""
+        self.timeout = timeout
+
+    def send(self, notification: dict) -> None:
+        """Delivers the notification."""
+        raise NotImplementedError
+
+
+class WebhookSink(Sink):
+    """Posts notifications as JSON to a URL."""
+
+    name = 'webhook'
+
+    def __init__(self, url: str, timeout: float = SINK_TIMEOUT) -> None:
+        """Remembers the URL and the timeout."""
+        super().__init__(timeout)
+        self.url = url
+
+    def send(self, notification: dict) -> None:
+        """Posts the notification, raises on errors and timeouts."""
+        import requests
+
+        from homework_bot import sessions
+        from homework_bot.deadlines import CONNECT_TIMEOUT
+
+        try:
+            response = sessions.post(
+                self.url, json=notification,
+                timeout=(min(CONNECT_TIMEOUT, self.timeout), self.timeout)
+            )
+        except requests.exceptions.Timeout:
+            raise TimeoutError(
+                f'Webhook did not answer within {self.timeout} s.'
+            )
+        response.raise_for_status()
+
+
+class JsonlSink(Sink):
+    """Appends notifications to a file, one JSON object per line."""
+
+    name = 'jsonl'
+
+    def __init__(self, path: str, timeout: float = SINK_TIMEOUT) -> None:
+        """Remembers the path, the file is opened on every write."""
+        super().__init__(timeout)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, notification: dict) -> None:
+        """Appends the notification."""
+        line = json.dumps(notification, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line + '\n')
+
+
+class Dispatcher:
+    """Delivers notifications to sinks on a bounded thread pool.
+    `dispatch` never waits for a sink. Every sink has its own queue
+    drained by at most one worker at a time, so a slow sink holds one
+    worker and only delays itself; when its queue grows past
+    `max_pending` the oldest notifications are dropped.
+    """
+
+    def __init__(self, sinks: list, workers: int = SINK_WORKERS,
+                 max_pending: int = SINK_MAX_PENDING) -> None:
+        """Starts no threads until the first notification."""
+        if workers < 1:
+            raise ValueError('At least one worker is needed.')
+        self.sinks = list(sinks)
+        self.max_pending = max_pending
+        self._queues = {sink: deque() for sink in self.sinks}
+        self._running = set()
+        self._idle = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            workers, thread_name_prefix='sink'
+        )
+
+    def dispatch(self, text: str, chat_ids: tuple = ()) -> None:
+        """Queues the notification for every sink."""
+        notification = {
+            'text': text, 'chat_ids': list(chat_ids), 'time': int(time.time())
+        }
+        for sink in self.sinks:
+            with self._idle:
+                pending = self._queues[sink]
+                if len(pending) >= self.max_pending:
+                    pending.popleft()
+                    metrics.SINK_DROPPED.inc(sink=sink.name)
+                    logger.warning(f'Sink {sink.name} fell behind.')
+                pending.append(notification)
+                if sink in self._running:
+                    continue
+                self._running.add(sink)
+            self._executor.submit(self._drain, sink)
+
+    def _drain(self, sink: Sink) -> None:
+        while True:
+            with self._idle:
+                pending = self._queues[sink]
+                if not pending:
+                    self._running.discard(sink)
+                    self._idle.notify_all()
+                    return
+                notification = pending.popleft()
+            self._send(sink, notification)
+
+    @staticmethod
+    def _send(sink: Sink, notification: dict) -> None:
+        try:
+            with metrics.Timer() as timer:
+                sink.send(notification)
+        except Exception as error:
+            metrics.SINK_FAILURES.inc(
+                sink=sink.name, error=type(error).__name__
+            )
+            if isinstance(error, TimeoutError):
+                metrics.TIMEOUTS.inc(target=sink.name)
+            logger.error(f'Sink {sink.name} failed: {error}')
+            return
+        metrics.SINK_SECONDS.observe(timer.elapsed, sink=sink.name)
+
+    def join(self, timeout: float = None) -> bool:
+        """Waits until every queued notification is handled."""
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: not self._running, timeout=timeout
+            )
+
+    def close(self) -> None:
+        """Handles what is queued and stops the workers."""
+        self.join()
+        self._executor.shutdown()
+
+
+def configured_sinks() -> list:
+    """Sinks set up with NOTIFY_WEBHOOK_URL and NOTIFY_JSONL."""
+    sinks = []
+    if NOTIFY_WEBHOOK_URL:
+        sinks.append(WebhookSink(NOTIFY_WEBHOOK_URL))
+    if NOTIFY_JSONL:
+        sinks.append(JsonlSink(NOTIFY_JSONL))
+    return sinks
+
+
+_dispatcher = None
+_lock = threading.Lock()
+
+
+def dispatcher() -> Dispatcher:
+    """Dispatcher of the configured sinks, shared by all tenants."""
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None:
+            _dispatcher = Dispatcher(configured_sinks())
+        return _dispatcher
+
+
+def close() -> None:
+    """Delivers queued notifications of the shared dispatcher."""
+    global _dispatcher
+    with _lock:
+        shared, _dispatcher = _dispatcher, None
+    if shared is not None:
+        shared.close()
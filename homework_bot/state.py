@@ -0,0 +1,105 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+STATE_MAX_ENTRIES = int(os.getenv('STATE_MAX_ENTRIES', 10000))
+STATE_TTL = int(os.getenv('STATE_TTL', 60 * 60 * 24 * 90))
+STATE_DB = os.getenv('STATE_DB')
+DEFAULT_STATE_DB = 'state.db'
+
+
+class NotificationState:
+    """Remembers the last notified status of every homework.
+    A (scope, homework id, status) key is in the state while it is the
+    last status notified for the homework, so a homework that goes
+    back to an earlier status is notified again. Lookups are O(1),
+    the least recently used homeworks are evicted when `max_entries`
+    is reached and entries older than `ttl` seconds are forgotten.
+    With `path` given the state is also kept in SQLite and survives
+    restarts.
+    """
+
+    def __init__(self, max_entries: int = STATE_MAX_ENTRIES,
+                 ttl: int = STATE_TTL, path: str = None) -> None:
+        """Opens the SQLite database if `path` is given."""
+        if max_entries < 1:
+            raise ValueError('State needs room for at least one entry.')
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS last_status ('
+                'scope TEXT, homework_id TEXT, status TEXT, '
+                'notified_at REAL, PRIMARY KEY (scope, homework_id))'
+            )
+            self._db.execute(
+                'DELETE FROM last_status WHERE notified_at < ?',
+                (time.time() - ttl,)
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(scope: str, homework_id, status: str) -> tuple:
+        """Key of the homework status within the scope (tenant)."""
+        return str(scope), str(homework_id), str(status)
+
+    def __len__(self) -> int:
+        """Number of homeworks kept in memory."""
+        return len(self._entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        """Checks if the status is the last one notified."""
+        scope, homework_id, status = key
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((scope, homework_id))
+            if entry is None and self._db is not None:
+                entry = self._db.execute(
+                    'SELECT status, notified_at FROM last_status '
+                    'WHERE scope = ? AND homework_id = ?',
+                    (scope, homework_id)
+                ).fetchone()
+                if entry is not None:
+                    self._remember((scope, homework_id), tuple(entry))
+            if entry is None:
+                return False
+            if now - entry[1] > self.ttl:
+                self._entries.pop((scope, homework_id), None)
+                return False
+            self._entries.move_to_end((scope, homework_id))
+            return entry[0] == status
+
+    def add(self, key: tuple) -> None:
+        """Marks the status as the last one notified for the homework."""
+        scope, homework_id, status = key
+        now = time.time()
+        with self._lock:
+            self._remember((scope, homework_id), (status, now))
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO last_status VALUES (?, ?, ?, ?)',
+                    (*key, now)
+                )
+                self._db.commit()
+
+    def _remember(self, homework: tuple, entry: tuple) -> None:
+        self._entries[homework] = entry
+        self._entries.move_to_end(homework)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        """Closes the SQLite database."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,285 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import sqlite3
+import threading
+import time
+
+import homework
+from homework_bot.cursor import SqliteCursorStore, tenant_key
+from homework_bot.engine import PollingEngine
+from homework_bot.errors import ErrorStore
+from homework_bot.outbound import TELEGRAM_GLOBAL_RATE, SendQueue
+from homework_bot.outbox import OUTBOX_DB, Outbox
+from homework_bot.state import DEFAULT_STATE_DB, STATE_DB, NotificationState
+from homework_bot.tenants import load_tenants
+
+logger = logging.getLogger(__name__)
+
+SHARD_DB = os.getenv('SHARD_DB', 'shards.db')
+SHARD_HEARTBEAT = float(os.getenv('SHARD_HEARTBEAT', 5))
+SHARD_TIMEOUT = float(os.getenv('SHARD_TIMEOUT', 30))
+SHARD_REPLICAS = int(os.getenv('SHARD_REPLICAS', 100))
+
+
+def _hash(value: str) -> int:
+    return int(hashlib.md5(value.encode()).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Consistent hash ring of worker ids.
+    Every worker owns `replicas` points, so adding or removing one
+    worker moves only about 1/N of the keys.
+    """
+
+    def __init__(self, nodes=(), replicas: int = SHARD_REPLICAS) -> None:
+        """Places the nodes on the ring."""
+        self.replicas = replicas
+        self._points = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        """Places the node on the ring."""
+        for replica in range(self.replicas):
+            bisect.insort(self._points, (_hash(f'{node}#{replica}'), node))
+
+    def remove(self, node: str) -> None:
+        """Takes the node off the ring."""
+        self._points = [point for point in self._points if point[1] != node]
+
+    def node_for(self, key: str) -> str:
+        """Node owning the key, None if the ring is empty."""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, (_hash(key), ''))
+        return self._points[index % len(self._points)][1]
+
+
+class Coordinator:
+    """Registry of live workers in a SQLite file shared by processes.
+    Workers write heartbeats, a worker is live until its heartbeat is
+    older than `timeout` seconds.
+    """
+
+    def __init__(self, path: str = SHARD_DB,
+                 timeout: float = SHARD_TIMEOUT) -> None:
+        """Opens the database and creates the table if needed."""
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS workers ('
+            'worker_id TEXT PRIMARY KEY, pid INTEGER, heartbeat REAL)'
+        )
+        self._db.commit()
+
+    def heartbeat(self, worker_id: str, pid: int = None) -> None:
+        """Marks the worker as live."""
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO workers VALUES (?, ?, ?)',
+                (worker_id, pid or os.getpid(), time.time())
+            )
+            self._db.commit()
+
+    def remove(self, worker_id: str) -> None:
+        """Forgets the worker, its tenants go to the others."""
+        with self._lock:
+            self._db.execute(
+                'DELETE FROM workers WHERE worker_id = ?', (worker_id,)
+            )
+            self._db.commit()
+
+    def live_workers(self) -> list:
+        """Ids of workers with a fresh heartbeat."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT worker_id FROM workers WHERE heartbeat >= ? '
+                'ORDER BY worker_id', (time.time() - self.timeout,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        """Closes the database."""
+        with self._lock:
+            self._db.close()
+
+
+def shard_key(tenant) -> str:
+    """Ring key of the tenant, tenants of one token stay together."""
+    return tenant_key(tenant.practicum_token)
+
+
+class ShardWorker:
+    """Polls the tenants the ring assigns to this worker.
+    The ring is rebuilt from live workers before every cycle, so
+    tenants of a dead worker are taken over once its heartbeat expires.
+    """
+
+    def __init__(self, worker_id: str, coordinator: Coordinator,
+                 engine: PollingEngine, tenants: list) -> None:
+        """Takes no tenants until `rebalance` is called."""
+        self.worker_id = worker_id
+        self.coordinator = coordinator
+        self.engine = engine
+        self.tenants = tenants
+        self.workers = ()
+
+    def rebalance(self) -> list:
+        """Assigns the shard of this worker to the engine."""
+        workers = tuple(self.coordinator.live_workers())
+        if self.worker_id not in workers:
+            workers = tuple(sorted(workers + (self.worker_id,)))
+        if workers != self.workers:
+            logger.info(f'{self.worker_id}: workers are {list(workers)}.')
+            self.workers = workers
+        ring = HashRing(workers)
+        shard = [
+            tenant for tenant in self.tenants
+            if ring.node_for(shard_key(tenant)) == self.worker_id
+        ]
+        self.engine.assign(shard)
+        return shard
+
+    async def run_forever(self) -> None:
+        """Rebalances and polls due tenants until the process is stopped."""
+        while True:
+            self.rebalance()
+            await self.engine.run_cycle()
+            next_poll_at = min(
+                (state.next_poll_at for state in self.engine.states.values()),
+                default=time.monotonic() + SHARD_HEARTBEAT
+            )
+            await asyncio.sleep(min(
+                max(next_poll_at - time.monotonic(), 0), SHARD_HEARTBEAT
+            ))
+
+
+def run_worker(worker_id: str, tenants_path: str, workers: int) -> None:
+    """Entry point of a worker process."""
+    homework.init()
+    import telegram
+
+    coordinator = Coordinator()
+    coordinator.heartbeat(worker_id)
+
+    def beat() -> None:
+        while True:
+            time.sleep(SHARD_HEARTBEAT)
+            coordinator.heartbeat(worker_id)
+
+    threading.Thread(target=beat, name='heartbeat', daemon=True).start()
+    bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    sender = SendQueue(
+        bot, global_rate=TELEGRAM_GLOBAL_RATE / max(workers, 1)
+    ).start()
+    outbox = Outbox(sender, path=OUTBOX_DB).start()
+    engine = PollingEngine(
+        outbox, [], cursor=SqliteCursorStore(SHARD_DB),
+        notified=NotificationState(path=STATE_DB or DEFAULT_STATE_DB),
+        error_store=ErrorStore(STATE_DB or DEFAULT_STATE_DB)
+    )
+    worker = ShardWorker(
+        worker_id, coordinator, engine, load_tenants(tenants_path)
+    )
+    asyncio.run(worker.run_forever())
+
+
+class Supervisor:
+    """Runs worker processes and restarts those that die.
+    A dead worker is removed from the registry at once, so the others
+    take over its tenants until its replacement sends a heartbeat.
+    """
+
+    def __init__(self, tenants_path: str, workers: int,
+                 coordinator: Coordinator = None,
+                 target=run_worker) -> None:
+        """Starts nothing until `start` is called."""
+        if workers < 1:
+            raise ValueError('At least one worker is needed.')
+        self.tenants_path = tenants_path
+        self.workers = workers
+        self.coordinator = coordinator or Coordinator()
+        self.target = target
+        self.processes = {}
+        self.restarts = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._stopped = threading.Event()
+
+    def _spawn(self, worker_id: str) -> None:
+        process = self._context.Process(
+            target=self.target,
+            args=(worker_id, self.tenants_path, self.workers),
+            name=worker_id
+        )
+        process.start()
+        self.processes[worker_id] = process
+
+    def start(self) -> 'Supervisor':
+        """Starts `workers` worker processes."""
+        for index in range(self.workers):
+            self._spawn(f'worker-{index}')
+        return self
+
+    def scale(self, workers: int) -> None:
+        """Adds or stops workers, the ring is rebalanced by heartbeats."""
+        if workers < 1:
+            raise ValueError('At least one worker is needed.')
+        self.workers = workers
+        for index in range(workers, len(self.processes)):
+            worker_id = f'worker-{index}'
+            self._stop_process(self.processes.pop(worker_id))
+            self.coordinator.remove(worker_id)
+        for index in range(workers):
+            if f'worker-{index}' not in self.processes:
+                self._spawn(f'worker-{index}')
+
+    def check(self) -> list:
+        """Restarts dead workers, returns their ids."""
+        dead = [
+            worker_id for worker_id, process in self.processes.items()
+            if not process.is_alive()
+        ]
+        for worker_id in dead:
+            logger.error(
+                f'{worker_id} exited with '
+                f'{self.processes[worker_id].exitcode}, restarting.'
+            )
+            self.coordinator.remove(worker_id)
+            self._spawn(worker_id)
+            self.restarts += 1
+        return dead
+
+    @staticmethod
+    def _stop_process(process) -> None:
+        process.terminate()
+        process.join(SHARD_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def stop(self) -> None:
+        """Stops every worker."""
+        self._stopped.set()
+        for worker_id, process in self.processes.items():
+            self._stop_process(process)
+            self.coordinator.remove(worker_id)
+        self.processes = {}
+
+    def run(self) -> None:
+        """Supervises workers until SIGTERM or Ctrl+C."""
+        signal.signal(signal.SIGTERM, lambda *args: self._stopped.set())
+        self.start()
+        try:
+            while not self._stopped.wait(SHARD_HEARTBEAT):
+                self.check()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
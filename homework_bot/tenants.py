@@ -0,0 +1,82 @@
+import json
+from dataclasses import dataclass, field
+
+from homework_bot.board import StatusBoard
+from homework_bot.errors import ErrorAggregator
+from homework_bot.response_cache import ResponseCache
+from homework_bot.singleflight import SingleFlight
+from homework_bot.state import NotificationState
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Pair of Practicum account and Telegram chat to notify."""
+
+    practicum_token: str
+    chat_id: str
+
+    @property
+    def chat_ids(self) -> tuple:
+        """Chats to notify, the same as for a Subscription."""
+        return (self.chat_id,)
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """Practicum account followed by several Telegram chats.
+    The account is polled once, the result goes to every chat.
+    """
+
+    practicum_token: str
+    chat_ids: tuple
+
+
+def group_tenants(tenants: list) -> list:
+    """Subscriptions of tenants sharing a token, in the order of tokens."""
+    chats = {}
+    for tenant in tenants:
+        token_chats = chats.setdefault(tenant.practicum_token, [])
+        if tenant.chat_id not in token_chats:
+            token_chats.append(tenant.chat_id)
+    return [
+        Subscription(token, tuple(chat_ids))
+        for token, chat_ids in chats.items()
+    ]
+
+
+@dataclass
+class TenantState:
+    """Everything the bot remembers about a tenant between polls."""
+
+    from_date: int
+    notified: NotificationState = field(default_factory=NotificationState)
+    errors: ErrorAggregator = field(default_factory=ErrorAggregator)
+    cache: ResponseCache = field(default_factory=ResponseCache)
+    board: StatusBoard = field(default_factory=StatusBoard)
+    flights: SingleFlight = field(default_factory=SingleFlight)
+    last_status: str = None
+    failures: int = 0
+    next_poll_at: float = 0
+
+
+def load_tenants(path: str) -> list:
+    """Reads tenants from a JSON file.
+    The file holds a list of objects with "practicum_token" and
+    "chat_id" keys, "chat_ids" list gives several chats at once.
+    """
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, list):
+        raise TypeError('Tenants file must contain a list of tenants.')
+    try:
+        return [
+            Tenant(str(item['practicum_token']), str(chat_id))
+            for item in data
+            for chat_id in (
+                item['chat_ids'] if 'chat_ids' in item else [item['chat_id']]
+            )
+        ]
+    except (KeyError, TypeError) as error:
+        raise KeyError(
+            f'Every tenant needs "practicum_token" and "chat_id": {error}'
+        )
@@ -5,5 +5,6 @@ root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 pytest_plugins = [
-    'tests.fixtures.fixture_data'
+    'tests.fixtures.fixture_data',
+    'tests.fixtures.fake_api',
 ]
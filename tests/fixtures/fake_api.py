@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from benchmarks.fakes import FakePracticumServer
+from homework_bot import breaker
+
+
+class FakeResponse:
+
+    def __init__(self, payload, status_code=200, headers=None):
+        self.content = json.dumps(payload).encode()
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeBot:
+
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.messages.append((chat_id, text))
+
+
+@pytest.fixture
+def fake_api():
+    server = FakePracticumServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def fake_bot():
+    return FakeBot()
+
+
+@pytest.fixture(autouse=True)
+def circuit_breakers():
+    yield
+    breaker.reset_all()
@@ -0,0 +1,63 @@
+from benchmarks import decoding as decoding_benchmark
+from benchmarks import memory as memory_benchmark
+from benchmarks.pipeline import percentile, run_benchmark
+
+
+class TestPipelineBenchmark:
+
+    def test_results_are_reported(self):
+        results = run_benchmark(tenants=20, cycles=2, concurrency=5)
+
+        assert results['polls'] == 40
+        assert results['failed'] == 0
+        assert results['servers']['telegram_messages'] == 40, (
+            'Проверьте, что бенчмарк отправляет сообщения через фейковый '
+            'Telegram'
+        )
+        assert results['throughput'] > 0
+        assert 0 < results['latency']['p50'] <= results['latency']['p99']
+        assert set(results['stages']) == {'fetch', 'check', 'parse', 'send'}
+        assert results['memory']['max_rss_kb'] > 0
+
+    def test_errors_are_injected(self):
+        results = run_benchmark(
+            tenants=20, cycles=1, concurrency=5, api_error_rate=1
+        )
+
+        assert results['failed'] == 20
+        assert results['servers']['telegram_messages'] == 0
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile([], 0.5) == 0.0
+
+
+class TestDecodingBenchmark:
+
+    def test_modes_are_compared(self):
+        results = decoding_benchmark.run_benchmark(homeworks=200, repeats=1)
+
+        assert set(results['modes']) == set(decoding_benchmark.MODES)
+        for result in results['modes'].values():
+            assert result['seconds'] > 0
+            assert result['peak_kb'] >= 0
+
+    def test_modes_count_the_same_homeworks(self):
+        body = decoding_benchmark.make_body(50)
+
+        assert {
+            decode(body, 16) for decode in decoding_benchmark.MODES.values()
+        } == {50}
+
+
+class TestMemoryBenchmark:
+
+    def test_records_are_smaller_than_dicts(self):
+        modes = memory_benchmark.run_benchmark(homeworks=2000)['modes']
+
+        assert 0 < modes['records']['bytes_per_homework'] < (
+            modes['dicts']['bytes_per_homework']
+        )
@@ -0,0 +1,152 @@
+from types import SimpleNamespace
+
+import pytest
+
+import homework
+from benchmarks.fakes import FakePracticumServer
+from homework_bot.breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker,
+                                  CircuitOpenError, breaker_for, is_outage)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fail():
+    raise ConnectionError('down')
+
+
+def ok():
+    return 'ok'
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    breaker = CircuitBreaker(
+        'test', window=10, min_calls=4, failure_rate=0.5, open_time=30,
+        probes=2, clock=clock
+    )
+    breaker.transitions = []
+    breaker.subscribe(
+        lambda name, old, new: breaker.transitions.append((old, new))
+    )
+    return breaker
+
+
+def call(breaker, func):
+    try:
+        return breaker.call(func)
+    except ConnectionError as error:
+        return error
+
+
+class TestCircuitBreaker:
+
+    def test_opens_at_failure_rate(self, breaker):
+        for func in (ok, fail, ok):
+            call(breaker, func)
+        assert breaker.state == CLOSED, (
+            'Проверьте, что до min_calls вызовов цепь не размыкается'
+        )
+        call(breaker, fail)
+
+        assert breaker.state == OPEN
+        assert isinstance(call(breaker, ok), CircuitOpenError)
+        assert breaker.transitions == [(CLOSED, OPEN)]
+
+    def test_probes_close_the_circuit(self, breaker, clock):
+        for _ in range(4):
+            call(breaker, fail)
+        clock.now = 30
+
+        assert call(breaker, ok) == 'ok'
+        assert breaker.state == HALF_OPEN
+        assert call(breaker, ok) == 'ok'
+        assert breaker.state == CLOSED
+        assert breaker.transitions == [
+            (CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)
+        ]
+
+    def test_failed_probe_opens_again(self, breaker, clock):
+        for _ in range(4):
+            call(breaker, fail)
+        clock.now = 30
+        call(breaker, fail)
+
+        assert breaker.state == OPEN
+        clock.now = 59
+        assert isinstance(call(breaker, ok), CircuitOpenError)
+        clock.now = 60
+        assert call(breaker, ok) == 'ok'
+
+    def test_probes_are_limited(self, clock):
+        breaker = CircuitBreaker(
+            'test', min_calls=1, open_time=30, probes=1, clock=clock
+        )
+        call(breaker, fail)
+        clock.now = 30
+        results = []
+
+        def probe():
+            results.append(call(breaker, ok))
+            return 'ok'
+
+        assert breaker.call(probe) == 'ok'
+        assert isinstance(results[0], CircuitOpenError), (
+            'Проверьте, что в полуоткрытом состоянии пропускается '
+            'не больше probes запросов'
+        )
+        assert breaker.state == CLOSED
+
+    def test_client_errors_do_not_count(self, breaker):
+        def unauthorized():
+            error = Exception('401')
+            error.response = SimpleNamespace(status_code=401)
+            raise error
+
+        for _ in range(10):
+            with pytest.raises(Exception):
+                breaker.call(unauthorized)
+        assert breaker.state == CLOSED
+
+    def test_outage_detection(self):
+        server_error = Exception()
+        server_error.response = SimpleNamespace(status_code=503)
+
+        assert is_outage(server_error)
+        assert is_outage(ConnectionError())
+        assert is_outage(TimeoutError())
+        assert not is_outage(ValueError())
+
+
+class TestEndpointBreaker:
+
+    def test_down_endpoint_is_not_hammered(self):
+        server = FakePracticumServer(error_rate=1).start()
+        try:
+            for _ in range(30):
+                with pytest.raises(Exception):
+                    homework.request_homeworks('token', 0, server.url)
+            requests_made = server.requests
+        finally:
+            server.stop()
+
+        breaker = breaker_for(server.url)
+        assert breaker.state == OPEN
+        assert requests_made == breaker.min_calls, (
+            'Проверьте, что при открытой цепи запросы к API не отправляются'
+        )
+
+    def test_breaker_is_shared_by_endpoint(self):
+        assert breaker_for(homework.ENDPOINT) is breaker_for(homework.ENDPOINT)
+        assert breaker_for(homework.ENDPOINT) is not breaker_for('other')
@@ -0,0 +1,134 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import homework
+from homework_bot.board import StatusBoard
+from homework_bot.commands import CommandPoller, render_status
+from homework_bot.models import Homework
+
+HOMEWORKS = [
+    {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing'},
+    {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+]
+
+
+class UpdatesBot:
+
+    def __init__(self, texts):
+        self.updates = [
+            SimpleNamespace(
+                update_id=number,
+                message=SimpleNamespace(chat_id='1', text=text)
+            )
+            for number, text in enumerate(texts, start=100)
+        ]
+        self.messages = []
+        self.offsets = []
+
+    def get_updates(self, offset=None, **kwargs):
+        self.offsets.append(offset)
+        updates, self.updates = self.updates, []
+        return updates
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.messages.append((chat_id, text))
+
+
+@pytest.fixture
+def board():
+    board = StatusBoard()
+    board.update('1', homework.validate_answer(
+        {'homeworks': HOMEWORKS}
+    ).homeworks)
+    board.touch('1')
+    return board
+
+
+class TestCommands:
+
+    def test_status_is_answered_from_board(self, board, monkeypatch,
+                                           tmp_path):
+        def forbidden(*args, **kwargs):
+            raise AssertionError('API must not be requested')
+
+        monkeypatch.setattr(homework, 'fetch_homeworks', forbidden)
+        bot = UpdatesBot(['/status', 'hello', '/history@homework_bot'])
+        poller = CommandPoller(
+            bot, board, offset_path=str(tmp_path / 'offset.json')
+        )
+
+        assert poller.poll() == 2, (
+            'Проверьте, что бот отвечает на /status и /history'
+        )
+        status = bot.messages[0][1]
+        assert homework.HOMEWORK_STATUSES['reviewing'] in status
+        assert homework.HOMEWORK_STATUSES['approved'] in status
+        history = bot.messages[1][1].splitlines()
+        assert '"hw1"' in history[0] and '"hw2"' in history[1], (
+            'Проверьте, что история выводится от старых изменений к новым'
+        )
+
+    def test_offset_is_persisted(self, board, tmp_path):
+        path = str(tmp_path / 'offset.json')
+        CommandPoller(UpdatesBot(['/status']), board, offset_path=path).poll()
+        bot = UpdatesBot([])
+        CommandPoller(bot, board, offset_path=path).poll()
+
+        assert bot.offsets == [101], (
+            'Проверьте, что offset обновлений сохраняется между запусками'
+        )
+
+    def test_poller_survives_unexpected_errors(self, board, monkeypatch,
+                                                tmp_path):
+        monkeypatch.setattr(homework, 'RETRY_TIME_AFTER_ERROR', 0)
+        bot = UpdatesBot(['/status'])
+        poller = CommandPoller(
+            bot, board, offset_path=str(tmp_path / 'missing' / 'offset.json')
+        )
+        get_updates = bot.get_updates
+
+        def get_updates_until_stopped(**kwargs):
+            if bot.offsets:
+                poller.stop()
+            return get_updates(**kwargs)
+
+        bot.get_updates = get_updates_until_stopped
+        poller.run()
+        assert bot.offsets == [None, 101], (
+            'Проверьте, что ошибка при обработке команд не останавливает '
+            'опрос обновлений'
+        )
+
+    def test_stale_data_is_flagged(self, board, monkeypatch):
+        assert 'устареть' not in render_status(board, '1', 600)
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now + 601)
+
+        assert 'устареть' in render_status(board, '1', 600), (
+            'Проверьте, что бот предупреждает об устаревших данных'
+        )
+
+    def test_empty_board_does_not_claim_no_homeworks(self):
+        board = StatusBoard()
+        board.touch('1')
+        answer = render_status(board, '1')
+
+        assert 'Работ на проверке нет' not in answer, (
+            'Проверьте, что пустая доска не означает отсутствия работ'
+        )
+        assert 'неизвестны' in answer
+
+    def test_unknown_chat(self, board):
+        assert 'ещё не проверялись' in render_status(StatusBoard(), '1')
+
+    def test_board_keeps_history_bounded(self):
+        board = StatusBoard(history_size=2)
+        for status in ('reviewing', 'rejected', 'reviewing', 'approved'):
+            board.update('1', [Homework('hw', status)])
+
+        assert [item[2] for item in board.history('1')] == [
+            'reviewing', 'approved'
+        ]
+        assert board.statuses('1') == {'hw': 'approved'}
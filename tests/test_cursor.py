@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+from homework_bot.cursor import CursorStore
+from homework_bot.engine import PollingEngine
+from homework_bot.tenants import Tenant
+
+
+class TestCursorStore:
+
+    def test_cursor_is_persisted(self, tmp_path):
+        path = str(tmp_path / 'cursor.json')
+        cursor = CursorStore(path)
+        assert cursor.load('token', 100) == 100
+        assert cursor.advance('token', 200)
+        cursor.save()
+
+        assert CursorStore(path).load('token', 100) == 200, (
+            'Проверьте, что курсор сохраняется между запусками'
+        )
+        assert os.listdir(tmp_path) == ['cursor.json'], (
+            'Проверьте, что временный файл не остаётся на диске'
+        )
+
+    def test_cursor_moves_forward_only(self, tmp_path):
+        cursor = CursorStore(str(tmp_path / 'cursor.json'))
+        cursor.advance('token', 200)
+
+        assert not cursor.advance('token', 150)
+        assert not cursor.advance('token', '300')
+        assert not cursor.advance('token', None)
+        assert cursor.load('token', 0) == 200
+
+    def test_broken_file_is_ignored(self, tmp_path):
+        path = tmp_path / 'cursor.json'
+        path.write_text('{not a json')
+
+        assert CursorStore(str(path)).load('token', 100) == 100
+
+    def test_engine_advances_cursor(self, tmp_path, fake_api, fake_bot):
+        path = str(tmp_path / 'cursor.json')
+        engine = PollingEngine(
+            fake_bot, [Tenant('token', '1')],
+            endpoint=fake_api.url, cursor=CursorStore(path)
+        )
+        asyncio.run(engine.run_cycle())
+
+        assert CursorStore(path).load('token', 0) == fake_api.current_date, (
+            'Проверьте, что курсор берётся из `current_date` ответа API'
+        )
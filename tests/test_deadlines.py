@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+import homework
+from benchmarks.fakes import FakePracticumServer
+from homework_bot import deadlines, metrics
+from homework_bot.deadlines import Deadline, DeadlineExceeded
+from homework_bot.tenants import Tenant, TenantState
+
+
+@pytest.fixture
+def slow_api():
+    server = FakePracticumServer(latency=1).start()
+    yield server
+    server.stop()
+
+
+class TestDeadline:
+
+    def test_timeouts_are_cut_to_the_budget(self):
+        now = [0.0]
+        deadline = Deadline(5, clock=lambda: now[0])
+
+        assert deadline.timeout(connect=3, read=20) == (3, 5)
+        now[0] = 4.5
+        assert deadline.timeout(connect=3, read=20) == (0.5, 0.5)
+        now[0] = 5
+        with pytest.raises(DeadlineExceeded):
+            deadline.timeout()
+
+    def test_nested_budget_cannot_outlive_outer(self):
+        assert deadlines.current() is None
+        with deadlines.budget(1) as outer:
+            with deadlines.budget(10) as inner:
+                assert inner is outer
+            with deadlines.budget(0.5) as inner:
+                assert inner.remaining() <= 0.5
+            assert deadlines.current() is outer
+        assert deadlines.current() is None
+
+    def test_timeouts_outside_budget(self):
+        assert deadlines.timeout(connect=1, read=2) == (1, 2)
+
+
+class TestSlowEndpoint:
+
+    def test_stalled_request_times_out(self, slow_api):
+        before = metrics.TIMEOUTS.value(target='api')
+        started = time.monotonic()
+        with deadlines.budget(0.2):
+            with pytest.raises(TimeoutError):
+                homework.call_api('token', 0, slow_api.url)
+
+        assert time.monotonic() - started < 0.9, (
+            'Проверьте, что запрос к API ограничен дедлайном цикла'
+        )
+        assert metrics.TIMEOUTS.value(target='api') == before + 1
+
+    def test_poll_cycle_is_bounded(self, slow_api, fake_bot, monkeypatch):
+        monkeypatch.setattr(deadlines, 'CYCLE_DEADLINE', 0.2)
+        state = TenantState(from_date=0)
+        started = time.monotonic()
+
+        assert not homework.poll_tenant(
+            fake_bot, Tenant('token', 1), state, slow_api.url
+        )
+        assert time.monotonic() - started < 0.9
+        assert state.failures == 1
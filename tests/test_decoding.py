@@ -0,0 +1,88 @@
+import json
+from json.decoder import JSONDecodeError
+
+import pytest
+import requests
+
+import homework
+from homework_bot import decoding
+from homework_bot.decoding import HomeworkStream
+
+ANSWER = {
+    'current_date': 1640995200,
+    'homeworks': [
+        {'id': number, 'homework_name': f'Домашка "{number}"',
+         'status': 'approved', 'score': 1.5e3}
+        for number in range(30)
+    ],
+    'extra': [1, {'nested': None}],
+}
+BODY = json.dumps(ANSWER, ensure_ascii=False).encode()
+
+
+def chunked(body, size):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class TestLoads:
+
+    def test_backends_agree(self):
+        assert decoding.loads(BODY) == json.loads(BODY)
+        assert decoding.backend('json') == 'json'
+        assert decoding.backend('auto') in ('json', 'orjson')
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            decoding.backend('yaml')
+
+    def test_invalid_json_raises_json_error(self):
+        with pytest.raises(JSONDecodeError):
+            decoding.loads(b'{"homeworks": [')
+
+    def test_decode_answer_of_real_response(self):
+        response = requests.Response()
+        response._content = BODY
+        assert homework.decode_answer(response) == ANSWER
+
+
+class TestHomeworkStream:
+
+    @pytest.mark.parametrize('size', [1, 2, 3, 7, 64, len(BODY)])
+    def test_any_chunking_gives_the_same_answer(self, size):
+        stream = HomeworkStream(chunked(BODY, size))
+
+        assert list(stream) == ANSWER['homeworks']
+        assert stream.fields == {
+            'current_date': ANSWER['current_date'],
+            'extra': ANSWER['extra'],
+        }
+
+    def test_homeworks_are_yielded_before_the_end(self):
+        def chunks():
+            yield b'{"homeworks": [{"id": 1}, '
+            raise AssertionError('Read past the first homework')
+
+        assert next(iter(HomeworkStream(chunks()))) == {'id': 1}
+
+    def test_empty_answer(self):
+        assert list(HomeworkStream([b'{"homeworks": []}'])) == []
+
+    @pytest.mark.parametrize('body, error', [
+        (b'{}', KeyError),
+        (b'{"current_date": 1}', KeyError),
+        (b'{"homeworks": 1}', TypeError),
+        (b'[]', JSONDecodeError),
+        (b'{"homeworks": [1,]}', JSONDecodeError),
+        (b'{"homeworks": [{"id": 1}]', JSONDecodeError),
+        (b'{"homeworks": []} tail', JSONDecodeError),
+        ('{"homeworks": ["ё"]}'.encode()[:-3], JSONDecodeError),
+    ])
+    def test_broken_answers(self, body, error):
+        with pytest.raises(error):
+            list(HomeworkStream(chunked(body, 4)))
+
+    def test_stream_homeworks_from_server(self, fake_api):
+        stream = homework.stream_homeworks('token', 0, fake_api.url)
+
+        assert [item['homework_name'] for item in stream] == ['token.zip']
+        assert stream.fields['current_date'] == fake_api.current_date
@@ -0,0 +1,76 @@
+import homework
+from homework_bot.diff import diff_homeworks, render_batch
+from homework_bot.state import NotificationState
+from homework_bot.tenants import Tenant, TenantState
+from tests.fixtures.fake_api import FakeResponse
+
+HOMEWORKS = [
+    {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing'},
+    {'id': 2, 'homework_name': 'hw2', 'status': 'rejected'},
+    {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+]
+
+
+RECORDS = homework.validate_answer({'homeworks': HOMEWORKS}).homeworks
+
+
+class TestDiff:
+
+    def test_every_changed_homework_is_found(self):
+        notified = NotificationState()
+        changes = diff_homeworks('tenant', RECORDS, notified)
+        assert len(changes) == 3, (
+            'Проверьте, что учитываются все домашки из ответа API'
+        )
+        notified.add(changes[0].key)
+
+        changes = diff_homeworks('tenant', RECORDS, notified)
+        assert [
+            homework.status_message(change.homework) for change in changes
+        ] == [
+            homework.parse_status(hw) for hw in HOMEWORKS[1:]
+        ]
+
+    def test_batch_respects_limit(self):
+        messages = ['a' * 10] * 5
+
+        assert render_batch(messages) == ['\n\n'.join(messages)]
+        assert render_batch(messages, limit=25) == [
+            'a' * 10 + '\n\n' + 'a' * 10
+        ] * 2 + ['a' * 10]
+        assert render_batch([]) == []
+
+    def test_changes_are_sent_in_one_message(self, monkeypatch, fake_bot):
+        monkeypatch.setattr(
+            homework, 'fetch_homeworks',
+            lambda *args: FakeResponse(
+                {'homeworks': HOMEWORKS, 'current_date': 1}
+            )
+        )
+        tenant = Tenant('token', '1')
+        state = TenantState(from_date=0)
+
+        assert homework.poll_tenant(fake_bot, tenant, state)
+        assert homework.poll_tenant(fake_bot, tenant, state)
+        assert len(fake_bot.messages) == 1, (
+            'Проверьте, что изменения отправляются одним сообщением'
+        )
+        for hw in HOMEWORKS:
+            assert homework.parse_status(hw) in fake_bot.messages[0][1]
+
+    def test_returning_status_is_notified(self, monkeypatch, fake_bot):
+        statuses = iter(['reviewing', 'rejected', 'reviewing', 'approved'])
+        monkeypatch.setattr(
+            homework, 'fetch_homeworks',
+            lambda *args: FakeResponse({'homeworks': [{
+                'id': 1, 'homework_name': 'hw1', 'status': next(statuses)
+            }], 'current_date': 1})
+        )
+        tenant = Tenant('token', '1')
+        state = TenantState(from_date=0)
+        for _ in range(4):
+            assert homework.poll_tenant(fake_bot, tenant, state)
+
+        assert len(fake_bot.messages) == 4, (
+            'Проверьте, что повторный статус после изменения отправляется'
+        )
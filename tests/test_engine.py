@@ -0,0 +1,91 @@
+import asyncio
+import json
+import time
+
+from homework_bot.engine import PollingEngine
+from homework_bot.scheduling import FixedSchedule
+from homework_bot.tenants import (Subscription, Tenant, group_tenants,
+                                  load_tenants)
+
+
+class TestPollingEngine:
+    TENANTS_QTY = 2000
+    CONCURRENCY = 50
+
+    def test_thousands_of_tenants_in_one_cycle(self, fake_api, fake_bot):
+        tenants = [
+            Tenant(f'token{i}', str(i)) for i in range(self.TENANTS_QTY)
+        ]
+        engine = PollingEngine(
+            fake_bot, tenants,
+            concurrency=self.CONCURRENCY, endpoint=fake_api.url
+        )
+        started = time.monotonic()
+        report = asyncio.run(engine.run_cycle())
+        duration = time.monotonic() - started
+
+        assert report.polled == self.TENANTS_QTY, (
+            'Проверьте, что за один цикл опрашиваются все пользователи'
+        )
+        assert report.failed == 0, (
+            'Проверьте, что опрос пользователей проходит без ошибок'
+        )
+        assert fake_api.requests == self.TENANTS_QTY
+        assert fake_api.max_in_flight <= self.CONCURRENCY, (
+            'Проверьте, что число одновременных запросов ограничено'
+        )
+        chats = {chat_id for chat_id, _ in fake_bot.messages}
+        assert len(chats) == self.TENANTS_QTY, (
+            'Проверьте, что каждый пользователь получает уведомление'
+        )
+        assert duration < 60
+
+    def test_status_is_sent_once(self, fake_api, fake_bot):
+        engine = PollingEngine(
+            fake_bot, [Tenant('token', '1')], endpoint=fake_api.url,
+            schedule=FixedSchedule(0, 0)
+        )
+        asyncio.run(engine.run_cycle())
+        asyncio.run(engine.run_cycle())
+
+        assert fake_api.requests == 2
+        assert len(fake_bot.messages) == 1, (
+            'Проверьте, что один и тот же статус не отправляется дважды'
+        )
+
+    def test_tenant_is_polled_when_due(self, fake_api, fake_bot):
+        engine = PollingEngine(
+            fake_bot, [Tenant('token', '1')], endpoint=fake_api.url
+        )
+        asyncio.run(engine.run_cycle())
+        report = asyncio.run(engine.run_cycle())
+
+        assert report.polled == 0, (
+            'Проверьте, что пользователь не опрашивается раньше срока'
+        )
+
+    def test_shared_token_is_polled_once(self, fake_api, fake_bot):
+        tenants = [Tenant('token', chat_id) for chat_id in ('1', '2', '3')]
+        engine = PollingEngine(fake_bot, tenants, endpoint=fake_api.url)
+        report = asyncio.run(engine.run_cycle())
+
+        assert report.polled == 1
+        assert fake_api.requests == 1, (
+            'Проверьте, что общий токен опрашивается один раз за цикл'
+        )
+        assert sorted(chat_id for chat_id, _ in fake_bot.messages) == [
+            '1', '2', '3'
+        ]
+        assert engine.board.statuses('3') == {'token.zip': 'approved'}
+
+    def test_chats_can_be_listed_together(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'practicum_token': 'a', 'chat_ids': [1, 2]},
+            {'practicum_token': 'b', 'chat_id': 3},
+            {'practicum_token': 'a', 'chat_id': 4},
+        ]))
+
+        assert group_tenants(load_tenants(str(path))) == [
+            Subscription('a', ('1', '2', '4')), Subscription('b', ('3',)),
+        ]
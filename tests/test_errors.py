@@ -0,0 +1,78 @@
+import time
+
+from homework_bot.errors import ErrorAggregator, ErrorStore, fingerprint
+
+
+def fail(error_class=ValueError, message='failure'):
+    try:
+        raise error_class(message)
+    except error_class as error:
+        return error
+
+
+class TestErrorAggregator:
+
+    def test_fingerprint_ignores_message(self):
+        assert fingerprint(fail(message='a')) == fingerprint(
+            fail(message='b')
+        )
+        assert fingerprint(fail(ValueError)) != fingerprint(fail(KeyError))
+        assert fingerprint(fail()).startswith('ValueError@test_errors.py')
+
+    def test_repeats_are_not_reported_at_once(self):
+        errors = ErrorAggregator()
+
+        assert errors.record(fail()), (
+            'Проверьте, что о первой ошибке сообщается сразу'
+        )
+        for _ in range(5):
+            assert not errors.record(fail()), (
+                'Проверьте, что повторы ошибки не отправляются сразу'
+            )
+        assert list(errors.counts().values()) == [6]
+
+    def test_summary_is_periodic(self, monkeypatch):
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now)
+        errors = ErrorAggregator(window=600, summary_interval=300)
+        for _ in range(3):
+            errors.record(fail())
+        assert errors.summaries() == []
+
+        monkeypatch.setattr(time, 'time', lambda: now + 300)
+        summaries = errors.summaries()
+        assert len(summaries) == 1
+        assert '3 occurrences in the last 10 min' in summaries[0], (
+            'Проверьте, что сводка содержит число повторов за окно'
+        )
+        assert errors.summaries() == [], (
+            'Проверьте, что сводка не повторяется без новых ошибок'
+        )
+
+    def test_old_errors_leave_window(self, monkeypatch):
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now)
+        errors = ErrorAggregator(window=600)
+        errors.record(fail())
+        monkeypatch.setattr(time, 'time', lambda: now + 601)
+
+        assert errors.counts() == {}
+        assert errors.record(fail()), (
+            'Проверьте, что ошибка вне окна считается новой'
+        )
+
+    def test_window_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        store = ErrorStore(path)
+        assert ErrorAggregator(store=store, scope='a').record(fail())
+        store.close()
+
+        store = ErrorStore(path)
+        assert not ErrorAggregator(store=store, scope='a').record(fail()), (
+            'Проверьте, что окно ошибок сохраняется между запусками'
+        )
+        assert ErrorAggregator(store=store, scope='b').record(fail())
+        assert list(
+            ErrorAggregator(store=store, scope='a').counts().values()
+        ) == [2]
+        store.close()
@@ -0,0 +1,163 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from benchmarks.fakes import FakePracticumServer
+from homework_bot import deadlines, metrics, sessions
+from homework_bot.hedging import Hedger
+
+
+def warmed_up(name, latency=0.01, budget=1.0):
+    hedger = Hedger(name, enabled=True, min_samples=5, budget=budget)
+    for _ in range(5):
+        hedger.record(latency)
+    return hedger
+
+
+class TestHedger:
+
+    def test_no_hedge_until_enough_samples(self):
+        hedger = Hedger('test', enabled=True, min_samples=5)
+        assert hedger.delay() is None
+        for latency in (0.1, 0.2, 0.3, 0.4, 0.5):
+            hedger.record(latency)
+        assert hedger.delay() == 0.5
+        assert Hedger('test', enabled=False).delay() is None
+
+    def test_slow_success_loses_to_hedge(self):
+        hedger = warmed_up('slow')
+        calls = []
+        closed = []
+
+        class Answer:
+            def __init__(self, name):
+                self.name = name
+
+            def close(self):
+                closed.append(self.name)
+
+        def call(timeout):
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.5)
+                return Answer('first')
+            return Answer('hedge')
+
+        started = time.monotonic()
+        assert hedger.call(call).name == 'hedge'
+        assert time.monotonic() - started < 0.3, (
+            'Проверьте, что медленный, но успешный запрос не ждут'
+        )
+        time.sleep(0.6)
+        assert closed == ['first'], (
+            'Проверьте, что ответ проигравшего запроса закрывается'
+        )
+        assert metrics.HEDGED_REQUESTS.value(
+            target='slow', result='won'
+        ) == 1
+
+    def test_fast_call_is_not_hedged(self):
+        hedger = warmed_up('fast', latency=1)
+        assert hedger.call(lambda timeout: 'result') == 'result'
+        assert metrics.HEDGED_REQUESTS.value(
+            target='fast', result='sent'
+        ) == 0
+
+    def test_hedge_rescues_stalled_call(self):
+        hedger = warmed_up('stalled')
+        calls = []
+
+        def call(timeout):
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.3)
+                raise TimeoutError('stalled')
+            return 'hedge'
+
+        started = time.monotonic()
+        assert hedger.call(call) == 'hedge'
+        assert time.monotonic() - started < 0.5
+        assert metrics.HEDGED_REQUESTS.value(
+            target='stalled', result='won'
+        ) == 1
+
+    def test_error_of_both_calls_is_raised(self):
+        hedger = warmed_up('broken')
+
+        def call(timeout):
+            time.sleep(0.05)
+            raise ConnectionError('down')
+
+        with pytest.raises(ConnectionError):
+            hedger.call(call)
+
+    def test_hedge_timeout_is_left_of_deadline(self):
+        hedger = warmed_up('deadline', latency=0.1)
+        timeouts = []
+
+        def call(timeout):
+            timeouts.append(timeout)
+            time.sleep(0.2)
+            return 'result'
+
+        with deadlines.budget(1):
+            hedger.call(call)
+        time.sleep(0.3)
+
+        first, hedge = timeouts
+        assert hedge[1] <= first[1] - 0.1, (
+            'Проверьте, что таймаут дубля учитывает остаток дедлайна'
+        )
+
+    def test_hedges_are_capped_by_budget(self):
+        hedger = warmed_up('saturated', latency=0.001, budget=0.05)
+        calls = []
+
+        def call(timeout):
+            calls.append(1)
+            time.sleep(0.01)
+            return 'result'
+
+        with ThreadPoolExecutor(20) as executor:
+            list(executor.map(lambda _: hedger.call(call), range(200)))
+        time.sleep(0.1)
+
+        hedges = metrics.HEDGED_REQUESTS.value(
+            target='saturated', result='sent'
+        )
+        assert hedges <= 200 * 0.05 + 1, (
+            'Проверьте, что число дублей ограничено бюджетом'
+        )
+        assert len(calls) == 200 + hedges
+
+
+class TestSlowServer:
+
+    def test_stalled_request_is_rescued(self):
+        server = FakePracticumServer(latency=2).start()
+        hedger = warmed_up(server.url, latency=0.05)
+        calls = []
+
+        def get(timeout):
+            calls.append(1)
+            if len(calls) == 2:
+                server.latency = 0
+            return sessions.get(
+                server.url, headers={'Authorization': 'OAuth token'},
+                timeout=timeout
+            )
+
+        try:
+            started = time.monotonic()
+            with deadlines.budget(0.5):
+                response = hedger.call(get)
+            assert response.status_code == 200
+            assert time.monotonic() - started < 1, (
+                'Проверьте, что зависший запрос заменяется дублем'
+            )
+        except requests.exceptions.Timeout:
+            pytest.fail('Hedge did not answer')
+        finally:
+            server.stop()
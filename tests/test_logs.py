@@ -0,0 +1,90 @@
+import json
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from homework_bot import logs
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / 'bot.log'
+    yield path
+    logs.stop_logging()
+
+
+class TestLogs:
+
+    def test_records_go_through_queue(self, log_path):
+        logs.setup_logging(path=str(log_path), stdout=False)
+        logging.getLogger('homework').error('Something failed')
+        logs.stop_logging()
+
+        assert log_path.read_text().endswith('ERROR: Something failed\n'), (
+            'Проверьте, что записи попадают в лог-файл'
+        )
+
+    def test_json_lines(self, log_path):
+        logs.setup_logging(
+            path=str(log_path), stdout=False, log_format='json'
+        )
+        logging.getLogger('homework').warning('Ошибка %s', 42)
+        logs.stop_logging()
+
+        record = json.loads(log_path.read_text())
+        assert record['message'] == 'Ошибка 42'
+        assert record['level'] == 'WARNING'
+        assert record['logger'] == 'homework'
+
+    def test_repeats_are_sampled(self, log_path):
+        logs.setup_logging(path=str(log_path), stdout=False)
+        for _ in range(100):
+            logging.getLogger('homework').error('Endpoint is unreachable.')
+        logs.stop_logging()
+
+        assert len(log_path.read_text().splitlines()) == 1, (
+            'Проверьте, что повторяющиеся сообщения прореживаются'
+        )
+
+    def test_sampling_filter_reports_dropped(self, monkeypatch):
+        sampler = logs.SamplingFilter(window=10)
+        now = 100.0
+        monkeypatch.setattr(logs.time, 'monotonic', lambda: now)
+
+        def record():
+            return logging.LogRecord(
+                'homework', logging.ERROR, __file__, 1, 'failure', None, None
+            )
+
+        assert sampler.filter(record())
+        assert not sampler.filter(record())
+        assert not sampler.filter(record())
+        now = 111.0
+        passed = record()
+        assert sampler.filter(passed)
+        assert passed.getMessage() == 'failure (2 similar messages dropped)'
+
+    def test_file_is_rotated(self, tmp_path):
+        handler = logs.make_file_handler(
+            str(tmp_path / 'bot.log'), rotate_when=None,
+            rotate_bytes=100, backup_count=2
+        )
+        logger = logging.getLogger('rotation')
+        logger.addHandler(handler)
+        logger.propagate = False
+        for number in range(20):
+            logger.error(f'message number {number}')
+        handler.close()
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            'bot.log', 'bot.log.1', 'bot.log.2'
+        ], 'Проверьте, что лог-файл ротируется'
+
+    def test_import_has_no_side_effects(self):
+        import homework  # noqa: F401
+
+        assert not any(
+            isinstance(handler, QueueHandler)
+            for handler in logging.getLogger().handlers
+        )
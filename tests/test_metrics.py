@@ -0,0 +1,100 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+import homework
+from homework_bot import metrics
+from homework_bot.board import StatusBoard
+from homework_bot.metrics import Registry
+from homework_bot.outbound import SendQueue
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    counter = registry.counter('jobs_total', 'Jobs done.', ('kind',))
+    gauge = registry.gauge('depth', 'Queue depth.')
+    counter.inc(kind='a')
+    counter.inc(2, kind='b"x')
+    gauge.set(3)
+    text = registry.render()
+    assert '# TYPE jobs_total counter' in text
+    assert 'jobs_total{kind="a"} 1' in text
+    assert 'jobs_total{kind="b\\"x"} 2' in text
+    assert 'depth 3' in text
+    with pytest.raises(ValueError):
+        counter.inc(other='a')
+    with pytest.raises(ValueError):
+        registry.counter('jobs_total', 'Duplicate.')
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.histogram('latency', 'Latency.', buckets=(1, 5))
+    for value in (0.5, 3, 10):
+        histogram.observe(value)
+    text = registry.render()
+    assert 'latency_bucket{le="1"} 1' in text
+    assert 'latency_bucket{le="5"} 2' in text
+    assert 'latency_bucket{le="+Inf"} 3' in text
+    assert 'latency_sum 13.5' in text
+    assert 'latency_count 3' in text
+    assert histogram.count() == 3
+
+
+def test_validation_failures_are_counted():
+    before = metrics.VALIDATION_FAILURES.value(
+        stage='parse_status', error='KeyError'
+    )
+    with pytest.raises(KeyError):
+        homework.parse_status({'status': 'approved'})
+    assert metrics.VALIDATION_FAILURES.value(
+        stage='parse_status', error='KeyError'
+    ) == before + 1
+
+
+def test_telegram_latency_is_observed_by_send_queue():
+    class Bot:
+        def send_message(self, chat_id, text, **kwargs):
+            pass
+
+    before = metrics.TELEGRAM_REQUEST_SECONDS.count()
+    sender = SendQueue(Bot(), workers=1).start()
+    homework.deliver_message(sender, 1, 'text')
+    sender.stop()
+    assert metrics.TELEGRAM_REQUEST_SECONDS.count() == before + 1
+
+
+def test_homeworks_are_tracked_once_per_tenant():
+    board = StatusBoard()
+    records = homework.validate_answer({'homeworks': [
+        {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+    ]}).homeworks
+    for chat_id in ('1', '2'):
+        board.update(chat_id, records)
+        board.track('tenant', records)
+    board.track('other', records)
+    assert board.homeworks_count() == 2, (
+        'Проверьте, что домашка считается один раз на аккаунт'
+    )
+
+
+def test_metrics_server_is_off_without_port(monkeypatch):
+    monkeypatch.delenv('METRICS_PORT', raising=False)
+    assert metrics.start_metrics_server() is None
+
+
+def test_metrics_server_serves_registry():
+    server = metrics.start_metrics_server(port='0')
+    try:
+        host, port = server.server_address
+        url = f'http://{host}:{port}'
+        with urllib.request.urlopen(f'{url}/metrics') as response:
+            body = response.read().decode()
+            assert response.headers['Content-Type'].startswith('text/plain')
+        assert '# TYPE homework_api_request_seconds histogram' in body
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f'{url}/other')
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,133 @@
+import pytest
+
+import homework
+from homework_bot.diff import homework_key
+from homework_bot.models import (UNKNOWN_STATUS, AnswerKeyError,
+                                 AnswerTypeError, Homework, Status,
+                                 ValidationError, compile_validator)
+from homework_bot.tenants import Tenant, TenantState
+from tests.fixtures.fake_api import FakeResponse
+
+
+class TestValidator:
+
+    def test_records_are_typed(self):
+        answer = homework.validate_answer({
+            'homeworks': [
+                {'id': 7, 'homework_name': 'hw7', 'status': 'approved'},
+                {'homework_name': 'hw6', 'status': 'reviewing'},
+            ],
+            'current_date': 10,
+        })
+
+        assert answer.homeworks == (
+            Homework('hw7', 'approved', 7), Homework('hw6', 'reviewing')
+        )
+        assert [item.key_id for item in answer.homeworks] == [7, 'hw6']
+        assert answer.current_date == 10
+
+    @pytest.mark.parametrize('answer, error', [
+        ([], TypeError),
+        ({}, KeyError),
+        ({'homeworks': {}}, TypeError),
+    ])
+    def test_errors_match_old_checks(self, answer, error):
+        with pytest.raises(error) as validation_error:
+            homework.validate_answer(answer)
+        with pytest.raises(error) as old_error:
+            homework.check_response(answer)
+
+        assert str(validation_error.value) == str(old_error.value)
+
+    def test_homework_errors_match_parse_status(self):
+        item = {'homework_name': 'hw', 'status': 'unknown'}
+        with pytest.raises(KeyError) as validation_error:
+            homework.validate_answer({'homeworks': [item]})
+        with pytest.raises(KeyError) as old_error:
+            homework.parse_status(item)
+
+        assert str(validation_error.value) == str(old_error.value)
+
+    def test_every_problem_is_collected(self):
+        with pytest.raises(AnswerKeyError) as error:
+            homework.validate_answer({'homeworks': [
+                {'homework_name': 'hw1'},
+                {'homework_name': 'hw2', 'status': 'approved'},
+                'hw3',
+                {'status': ['approved']},
+            ]})
+
+        assert [path for path, _ in error.value.errors] == [
+            'homeworks[0]', 'homeworks[2]', 'homeworks[3]',
+        ]
+        assert [type(item) for _, item in error.value.errors] == [
+            KeyError, TypeError, KeyError,
+        ]
+        assert '3 problems' in str(error.value)
+
+    def test_first_problem_decides_the_type(self):
+        with pytest.raises(AnswerTypeError):
+            compile_validator(('approved',))({'homeworks': [1, {}]})
+
+    def test_validator_is_compiled_once(self):
+        statuses = tuple(homework.HOMEWORK_STATUSES)
+
+        assert compile_validator(statuses) is compile_validator(statuses)
+        assert issubclass(AnswerKeyError, ValidationError)
+
+    def test_partial_answer_keeps_valid_homeworks(self):
+        answer = homework.validate_answer({'homeworks': [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'unknown'},
+        ], 'current_date': 10}, partial=True)
+
+        assert answer.homeworks == (Homework('hw1', 'approved', 1),)
+        assert [path for path, _ in answer.errors] == ['homeworks[1]']
+        assert answer.current_date == 10
+
+    def test_mixed_answer_is_notified(self, monkeypatch, fake_bot):
+        monkeypatch.setattr(
+            homework, 'fetch_homeworks',
+            lambda *args: FakeResponse({'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'unknown'},
+            ], 'current_date': 10})
+        )
+        state = TenantState(from_date=0)
+
+        assert homework.poll_tenant(fake_bot, Tenant('token', '1'), state)
+        texts = [text for _, text in fake_bot.messages]
+        assert any('hw1' in text for text in texts), (
+            'Проверьте, что корректные домашки уведомляются, '
+            'даже если в ответе есть некорректные'
+        )
+        assert any(UNKNOWN_STATUS in text for text in texts), (
+            'Проверьте, что о некорректных домашках сообщается'
+        )
+        assert state.from_date == 10, (
+            'Проверьте, что курсор сдвигается после частично верного ответа'
+        )
+
+
+class TestCompactModel:
+
+    def test_statuses_are_shared_enums(self):
+        answer = homework.validate_answer({'homeworks': [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': ''.join(['appr', 'oved'])},
+        ]})
+        first, second = answer.homeworks
+
+        assert first.status is second.status is Status.APPROVED
+        assert first.status == 'approved'
+
+    def test_records_have_no_dict(self):
+        assert not hasattr(Homework('hw', Status.REVIEWING), '__dict__')
+
+    def test_keys_on_disk_keep_api_codes(self):
+        record = Homework('hw', Status.REJECTED, 5)
+
+        assert homework_key('scope', record) == ('scope', '5', 'rejected')
+        assert homework.status_message(record) == homework.parse_status(
+            {'homework_name': 'hw', 'status': 'rejected'}
+        )
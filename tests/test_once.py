@@ -0,0 +1,54 @@
+import pytest
+import telegram
+
+import homework
+from homework_bot import logs
+from tests.fixtures.fake_api import FakeResponse
+
+PAYLOAD = {
+    'homeworks': [{'id': 1, 'homework_name': 'hw1', 'status': 'approved'}],
+    'current_date': 2000000000,
+}
+
+
+@pytest.fixture
+def once_env(monkeypatch, tmp_path, fake_bot):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+    monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+    monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '1')
+    monkeypatch.setattr(telegram, 'Bot', lambda token: fake_bot)
+    monkeypatch.setattr(
+        homework, 'fetch_homeworks', lambda *args: FakeResponse(PAYLOAD)
+    )
+    yield tmp_path
+    logs.stop_logging()
+
+
+class TestRunOnce:
+
+    def test_state_is_kept_between_runs(self, once_env, fake_bot):
+        assert homework.main(once=True)
+        assert homework.main(once=True)
+
+        assert len(fake_bot.messages) == 1, (
+            'Проверьте, что после перезапуска статус не отправляется повторно'
+        )
+        assert (once_env / 'state.db').exists()
+        assert (once_env / 'cursor.json').exists(), (
+            'Проверьте, что курсор сохраняется после запуска'
+        )
+
+    def test_repeated_failure_is_not_alerted_every_run(
+            self, once_env, fake_bot, monkeypatch):
+        def fail(*args):
+            raise ConnectionError('Endpoint is down')
+
+        monkeypatch.setattr(homework, 'fetch_homeworks', fail)
+        assert not homework.main(once=True)
+        assert not homework.main(once=True)
+
+        assert len(fake_bot.messages) == 1, (
+            'Проверьте, что повтор ошибки при запуске по cron '
+            'не отправляется каждый раз'
+        )
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import telegram
+
+from homework_bot.outbound import SendQueue, TokenBucket
+
+
+class FlakyBot:
+
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.messages.append((chat_id, text, time.monotonic()))
+
+
+class TestTokenBucket:
+
+    def test_rate_is_enforced(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+
+        assert bucket.reserve() == 0
+        assert 0.09 < bucket.reserve() <= 0.1, (
+            'Проверьте, что токены выдаются с заданной скоростью'
+        )
+
+
+class TestSendQueue:
+
+    def test_polling_is_not_blocked(self):
+        release = threading.Event()
+
+        class SlowBot:
+            def send_message(self, **kwargs):
+                release.wait()
+
+        sender = SendQueue(SlowBot(), workers=1).start()
+        started = time.monotonic()
+        sender.send_message(chat_id=1, text='text')
+        assert time.monotonic() - started < 0.1, (
+            'Проверьте, что постановка сообщения в очередь не ждёт Telegram'
+        )
+        release.set()
+        sender.stop()
+        assert sender.stats()['sent'] == 1
+
+    def test_retry_after_is_honoured(self):
+        bot = FlakyBot([telegram.error.RetryAfter(0.2)])
+        sender = SendQueue(bot, workers=1).start()
+        started = time.monotonic()
+        sender.send_message(chat_id=1, text='text')
+        sender.stop()
+
+        assert [message[1] for message in bot.messages] == ['text'], (
+            'Проверьте, что сообщение не теряется после RetryAfter'
+        )
+        assert bot.messages[0][2] - started >= 0.2
+        assert sender.stats()['retried'] == 1
+
+    def test_network_errors_are_retried(self):
+        bot = FlakyBot([telegram.error.NetworkError('down')] * 2)
+        sender = SendQueue(bot, workers=1, backoff=0.01).start()
+        sender.send_message(chat_id=1, text='text')
+        sender.stop()
+
+        assert len(bot.messages) == 1
+        assert sender.stats()['failed'] == 0
+
+    def test_retries_are_limited(self):
+        bot = FlakyBot([telegram.error.NetworkError('down')] * 3)
+        sender = SendQueue(
+            bot, workers=1, max_retries=1, backoff=0.01
+        ).start()
+        sender.send_message(chat_id=1, text='text')
+        sender.stop()
+
+        assert bot.messages == []
+        assert sender.stats()['failed'] == 1
+
+    def test_chat_rate_is_enforced(self):
+        bot = FlakyBot([])
+        sender = SendQueue(bot, workers=2, chat_rate=10).start()
+        for number in range(3):
+            sender.send_message(chat_id=1, text=str(number))
+        sender.stop()
+
+        assert [message[1] for message in bot.messages] == ['0', '1', '2'], (
+            'Проверьте, что сообщения одного чата идут по порядку'
+        )
+        assert bot.messages[2][2] - bot.messages[0][2] >= 0.15, (
+            'Проверьте, что соблюдается ограничение скорости для чата'
+        )
+
+    def test_worker_survives_unexpected_errors(self):
+        bot = FlakyBot([ValueError('broken')])
+        results = []
+
+        def on_done(sent):
+            results.append(sent)
+            raise RuntimeError('callback failed')
+
+        sender = SendQueue(bot, workers=1).start()
+        sender.send_message(chat_id=1, text='first', on_done=on_done)
+        sender.send_message(chat_id=1, text='second', on_done=on_done)
+        sender.stop()
+
+        assert results == [False, True], (
+            'Проверьте, что ошибка отправки не останавливает обработчик'
+        )
+        assert [message[1] for message in bot.messages] == ['second']
+        stats = sender.stats()
+        assert (stats['depth'], stats['failed']) == (0, 1)
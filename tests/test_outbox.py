@@ -0,0 +1,267 @@
+import sqlite3
+import time
+
+import pytest
+import telegram
+
+import homework
+from homework_bot.outbound import SendQueue
+from homework_bot.outbox import Outbox
+from homework_bot.tenants import Tenant, TenantState
+from tests.fixtures.fake_api import FakeResponse
+
+
+class FlakyBot:
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise telegram.error.BadRequest('Chat is unavailable')
+        self.messages.append((chat_id, text))
+
+
+@pytest.fixture
+def sender(fake_bot):
+    sender = SendQueue(fake_bot, workers=1).start()
+    yield sender
+    sender.stop()
+
+
+def deliver(outbox):
+    outbox.tick()
+    outbox.sender.join()
+    outbox.acknowledge()
+
+
+class TestOutbox:
+
+    def test_messages_are_delivered_and_compacted(self, sender, fake_bot,
+                                                  tmp_path):
+        outbox = Outbox(sender, path=str(tmp_path / 'outbox.db'))
+        outbox.send_message(chat_id=1, text='first')
+        outbox.send_message(chat_id=2, text='second')
+        assert outbox.pending() == 0, (
+            'Проверьте, что сообщения пишутся в outbox пакетом'
+        )
+        assert outbox.flush() == 2
+        assert outbox.pending() == 2
+
+        deliver(outbox)
+        assert fake_bot.messages == [(1, 'first'), (2, 'second')]
+        assert outbox.pending() == 0
+        assert outbox.compact() == 2
+        outbox.close()
+
+    def test_failed_message_is_retried(self):
+        bot = FlakyBot(failures=1)
+        sender = SendQueue(bot, workers=1, max_retries=0).start()
+        outbox = Outbox(sender, backoff=0)
+        outbox.send_message(chat_id=1, text='text')
+
+        deliver(outbox)
+        assert bot.messages == []
+        assert outbox.pending() == 1, (
+            'Проверьте, что неотправленное сообщение не теряется'
+        )
+        deliver(outbox)
+        assert bot.messages == [(1, 'text')]
+        outbox.close()
+        sender.stop()
+
+    def test_message_is_dropped_after_max_attempts(self):
+        sender = SendQueue(
+            FlakyBot(failures=5), workers=1, max_retries=0
+        ).start()
+        outbox = Outbox(sender, backoff=0, max_attempts=2)
+        outbox.send_message(chat_id=1, text='text')
+
+        deliver(outbox)
+        assert outbox.pending() == 1
+        deliver(outbox)
+        assert outbox.pending() == 0
+        outbox.close()
+        sender.stop()
+
+    def test_backoff_delays_retry(self):
+        bot = FlakyBot(failures=1)
+        sender = SendQueue(bot, workers=1, max_retries=0).start()
+        outbox = Outbox(sender, backoff=60)
+        outbox.send_message(chat_id=1, text='text')
+
+        deliver(outbox)
+        deliver(outbox)
+        assert bot.messages == []
+        sender.stop()
+
+    def test_pending_messages_survive_restart(self, sender, fake_bot,
+                                              tmp_path):
+        path = str(tmp_path / 'outbox.db')
+        crashed = Outbox(sender, path=path)
+        crashed.send_message(chat_id=1, text='text')
+        crashed.flush()
+
+        outbox = Outbox(sender, path=path)
+        outbox.close()
+        assert fake_bot.messages == [(1, 'text')], (
+            'Проверьте, что сообщения из outbox отправляются после перезапуска'
+        )
+
+    def test_claimed_entries_are_not_sent_twice(self, sender, fake_bot,
+                                                tmp_path):
+        path = str(tmp_path / 'outbox.db')
+        first, second = Outbox(sender, path=path), Outbox(sender, path=path)
+        first.send_message(chat_id=1, text='text')
+        first.flush()
+
+        assert first.drain() == 1
+        assert second.drain() == 0
+        sender.join()
+        assert fake_bot.messages == [(1, 'text')]
+
+    def test_delivery_thread(self, sender, fake_bot):
+        outbox = Outbox(sender, interval=0.01).start()
+        outbox.send_message(chat_id=1, text='text')
+        deadline = time.monotonic() + 5
+        while not fake_bot.messages:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        outbox.close()
+        assert fake_bot.messages == [(1, 'text')]
+
+
+class LaggingSender:
+
+    def __init__(self):
+        self.sent = []
+        self.callbacks = []
+
+    def send_message(self, chat_id=None, text=None, on_done=None, **kwargs):
+        self.sent.append(text)
+        self.callbacks.append(on_done)
+
+    def finish(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for on_done in callbacks:
+            on_done(True)
+
+    def join(self):
+        pass
+
+
+class TestLaggingSender:
+
+    def test_entries_are_not_resent_while_queued(self):
+        sender = LaggingSender()
+        outbox = Outbox(sender, batch=10, lease=0.05)
+        for number in range(40):
+            outbox.send_message(chat_id=1, text=str(number))
+
+        outbox.tick()
+        assert len(sender.sent) == 10, (
+            'Проверьте, что outbox не передаёт больше, чем помещается'
+        )
+        time.sleep(0.1)
+        outbox.tick()
+        assert len(sender.sent) == 10, (
+            'Проверьте, что сообщения в очереди отправки не отправляются '
+            'повторно после истечения аренды'
+        )
+        while outbox.pending():
+            sender.finish()
+            outbox.tick()
+        assert sender.sent == [str(number) for number in range(40)]
+        outbox.close()
+
+    def test_lease_is_renewed_for_other_processes(self, tmp_path):
+        path = str(tmp_path / 'outbox.db')
+        sender = LaggingSender()
+        first = Outbox(sender, lease=0.05, path=path)
+        second = Outbox(sender, lease=0.05, path=path)
+        first.send_message(chat_id=1, text='text')
+        first.tick()
+        time.sleep(0.1)
+        first.renew()
+
+        assert second.drain() == 0
+        assert sender.sent == ['text']
+
+    def test_entries_of_dead_sender_are_retried(self):
+        sender = LaggingSender()
+        outbox = Outbox(sender, batch=1, claim_timeout=0.1)
+        outbox.send_message(chat_id=1, text='lost')
+        outbox.send_message(chat_id=2, text='next')
+        outbox.tick()
+        sender.callbacks = []
+        outbox.tick()
+        assert sender.sent == ['lost']
+        time.sleep(0.15)
+        outbox.tick()
+        assert sender.sent == ['lost', 'lost'], (
+            'Проверьте, что зависшее сообщение возвращается в очередь'
+        )
+        sender.finish()
+        outbox.tick()
+        assert sender.sent == ['lost', 'lost', 'next'], (
+            'Проверьте, что зависшие сообщения не останавливают outbox'
+        )
+        sender.finish()
+        outbox.close()
+
+    def test_lease_is_not_renewed_for_stalled_sender(self, tmp_path):
+        path = str(tmp_path / 'outbox.db')
+        sender = LaggingSender()
+        first = Outbox(sender, lease=0.05, claim_timeout=0.2, path=path)
+        second = Outbox(sender, lease=0.05, path=path)
+        first.send_message(chat_id=1, text='old')
+        first.tick()
+        time.sleep(0.15)
+        first.send_message(chat_id=2, text='new')
+        first.tick()
+        time.sleep(0.1)
+        first.renew()
+        time.sleep(0.1)
+
+        assert second.drain() == 2, (
+            'Проверьте, что аренда не продлевается, пока отправка стоит'
+        )
+
+
+class TestPollTenant:
+
+    @pytest.fixture(autouse=True)
+    def answer(self, monkeypatch):
+        monkeypatch.setattr(
+            homework, 'fetch_homeworks',
+            lambda *args: FakeResponse({'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+            ], 'current_date': 1})
+        )
+
+    def test_changes_are_stored_before_marked_notified(self, tmp_path):
+        path = str(tmp_path / 'outbox.db')
+        outbox = Outbox(LaggingSender(), path=path)
+        state = TenantState(from_date=0)
+        assert homework.poll_tenant(outbox, Tenant('token', '1'), state)
+
+        assert len(state.notified) == 1
+        assert Outbox(LaggingSender(), path=path).pending() == 1, (
+            'Проверьте, что уведомление записано на диск до того, '
+            'как статус отмечен отправленным'
+        )
+
+    def test_changes_are_not_marked_if_not_stored(self):
+        class BrokenOutbox(Outbox):
+            def flush(self):
+                raise sqlite3.OperationalError('disk I/O error')
+
+        state = TenantState(from_date=0)
+        assert not homework.poll_tenant(
+            BrokenOutbox(LaggingSender()), Tenant('token', '1'), state
+        )
+        assert len(state.notified) == 0, (
+            'Проверьте, что несохранённое уведомление будет отправлено снова'
+        )
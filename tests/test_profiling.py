@@ -0,0 +1,116 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from homework_bot.engine import PollingEngine
+from homework_bot.profiling import Profiler, latest_profile, report
+from homework_bot.tenants import Tenant
+
+
+def allocate(store):
+    store.append([object() for _ in range(1000)])
+
+
+def test_idle_cycles_write_nothing(tmp_path):
+    profiler = Profiler(directory=str(tmp_path))
+    with profiler.cycle():
+        pass
+    assert profiler.written == []
+    assert os.listdir(tmp_path) == []
+
+
+def test_requested_cycles_are_profiled(tmp_path):
+    profiler = Profiler(directory=str(tmp_path))
+    profiler.request(2)
+    store = []
+    for _ in range(3):
+        with profiler.cycle():
+            allocate(store)
+    assert len(profiler.written) == 3
+    prefix = latest_profile(str(tmp_path))
+    assert profiler.written[0] == prefix + '.pstats'
+    stream = io.StringIO()
+    report(prefix, top=5, stream=stream)
+    output = stream.getvalue()
+    assert 'allocate' in output
+    assert 'test_profiling.py' in output
+
+
+def test_cpu_only_mode(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), mode='cpu')
+    profiler.request(1)
+    with profiler.cycle():
+        allocate([])
+    assert [path[-7:] for path in profiler.written] == ['.pstats']
+
+
+def profiled_functions(path):
+    return {name for _, _, name in pstats.Stats(path).stats}
+
+
+def test_tasks_on_other_threads_are_profiled(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), mode='cpu')
+    assert profiler.run(allocate, []) is None
+    profiler.request(1)
+    with profiler.cycle(), ThreadPoolExecutor(2) as executor:
+        list(executor.map(profiler.run, [allocate] * 4, [[]] * 4))
+    assert 'allocate' in profiled_functions(profiler.written[0]), (
+        'Проверьте, что задачи в рабочих потоках попадают в профиль'
+    )
+
+
+def test_engine_cycle_profiles_polls(tmp_path, fake_api, fake_bot):
+    engine = PollingEngine(
+        fake_bot, [Tenant(f'token{i}', str(i)) for i in range(4)],
+        concurrency=2, endpoint=fake_api.url
+    )
+    engine.profiler = Profiler(directory=str(tmp_path), mode='cpu')
+    engine.profiler.request(1)
+    asyncio.run(engine.run_cycle())
+    functions = profiled_functions(engine.profiler.written[0])
+    assert {'poll_tenant', 'validate_answer'} <= functions, (
+        'Проверьте, что опросы аккаунтов попадают в профиль цикла'
+    )
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Profiler(directory=str(tmp_path), mode='cpu,disk')
+
+
+def test_signal_requests_profiling(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), mode='memory')
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        profiler.install_signal_handler(cycles=1)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        with profiler.cycle():
+            allocate([])
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+    assert len(profiler.written) == 2
+
+
+def test_profiling_errors_do_not_break_tasks(tmp_path, monkeypatch):
+    class SingleToolProfile(cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            if threading.current_thread() is not threading.main_thread():
+                raise ValueError('Another profiling tool is already active')
+            return super().enable(*args, **kwargs)
+
+    monkeypatch.setattr(cProfile, 'Profile', SingleToolProfile)
+    profiler = Profiler(directory=str(tmp_path), mode='cpu')
+    profiler.request(1)
+    with profiler.cycle(), ThreadPoolExecutor(2) as executor:
+        results = list(executor.map(profiler.run, [len] * 4, [[1]] * 4))
+    assert results == [1] * 4, (
+        'Проверьте, что ошибка профилировщика не ломает опрос'
+    )
+    assert len(profiler.written) == 1
@@ -0,0 +1,72 @@
+import homework
+from homework_bot.response_cache import ResponseCache
+from homework_bot.tenants import Tenant, TenantState
+from tests.fixtures.fake_api import FakeResponse
+
+PAYLOAD = {
+    'homeworks': [{'id': 1, 'homework_name': 'hw1', 'status': 'approved'}],
+}
+
+
+class TestResponseCache:
+
+    def test_current_date_is_ignored(self):
+        cache = ResponseCache()
+        fingerprint = cache.lookup(
+            'scope', FakeResponse({**PAYLOAD, 'current_date': 1})
+        )
+        assert not fingerprint.unchanged
+        cache.store('scope', fingerprint)
+
+        fingerprint = cache.lookup(
+            'scope', FakeResponse({**PAYLOAD, 'current_date': 2})
+        )
+        assert fingerprint.unchanged, (
+            'Проверьте, что ответ с новым `current_date` '
+            'считается неизменным'
+        )
+        assert fingerprint.current_date == 2
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_etag_is_used(self):
+        cache = ResponseCache()
+        assert cache.headers('scope') == {}
+        cache.store('scope', cache.lookup('scope', FakeResponse(
+            PAYLOAD, headers={'ETag': '"v1"'}
+        )))
+
+        assert cache.headers('scope') == {'If-None-Match': '"v1"'}
+        assert cache.lookup(
+            'scope', FakeResponse({}, status_code=304)
+        ).unchanged
+
+    def test_unchanged_answer_skips_pipeline(self, monkeypatch, fake_bot):
+        calls = []
+        validate_answer = homework.validate_answer
+
+        def counting_validate_answer(answer, **kwargs):
+            calls.append(answer)
+            return validate_answer(answer, **kwargs)
+
+        dates = iter(range(1, 10))
+        monkeypatch.setattr(
+            homework, 'validate_answer', counting_validate_answer
+        )
+        monkeypatch.setattr(
+            homework, 'fetch_homeworks',
+            lambda *args: FakeResponse(
+                {**PAYLOAD, 'current_date': next(dates)}
+            )
+        )
+        state = TenantState(from_date=0)
+        for _ in range(5):
+            assert homework.poll_tenant(fake_bot, Tenant('token', 1), state)
+
+        assert len(calls) == 1, (
+            'Проверьте, что неизменный ответ API не разбирается повторно'
+        )
+        assert state.from_date == 5, (
+            'Проверьте, что курсор двигается и при неизменном ответе'
+        )
+        assert state.cache.stats()['hits'] == 4
@@ -0,0 +1,62 @@
+import pytest
+
+from homework_bot.scheduling import (AdaptiveSchedule, FixedSchedule,
+                                     IntervalStats, make_schedule)
+from homework_bot.tenants import TenantState
+
+
+class TestSchedules:
+
+    def test_fixed_schedule_is_default(self):
+        schedule = make_schedule(600, 60)
+        state = TenantState(from_date=0)
+
+        assert type(schedule) is FixedSchedule
+        assert schedule.next_interval(state, True) == 600
+        assert schedule.next_interval(state, False) == 60
+
+    def test_unknown_schedule(self):
+        with pytest.raises(KeyError):
+            make_schedule(600, 60, name='unknown')
+
+    def test_adaptive_schedule_follows_status(self):
+        schedule = AdaptiveSchedule(
+            600, 60, reviewing_interval=120, idle_interval=1800
+        )
+        state = TenantState(from_date=0)
+
+        assert schedule.next_interval(state, True) == 1800, (
+            'Проверьте, что без активных работ опрос идёт реже'
+        )
+        state.last_status = 'reviewing'
+        assert schedule.next_interval(state, True) == 120, (
+            'Проверьте, что работа на ревью опрашивается чаще'
+        )
+        state.last_status = 'rejected'
+        assert schedule.next_interval(state, True) == 600
+
+    def test_adaptive_schedule_backs_off(self):
+        schedule = AdaptiveSchedule(600, 60, max_backoff=300)
+        state = TenantState(from_date=0)
+        intervals = []
+        for failures in range(1, 6):
+            state.failures = failures
+            intervals.append(schedule.next_interval(state, False))
+
+        assert 30 <= intervals[0] <= 60
+        assert 120 <= intervals[2] <= 240, (
+            'Проверьте, что пауза после ошибок растёт экспоненциально'
+        )
+        assert intervals[4] <= 300
+
+
+class TestIntervalStats:
+
+    def test_stats(self):
+        stats = IntervalStats()
+        for interval in (60, 600, 120):
+            stats.record(interval)
+
+        assert stats.as_dict() == {
+            'count': 3, 'mean': 260, 'min': 60, 'max': 600, 'last': 120
+        }
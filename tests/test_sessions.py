@@ -0,0 +1,35 @@
+import requests
+
+from homework_bot.sessions import SessionPool
+
+
+class TestSessionPool:
+
+    def test_connection_is_reused(self, fake_api):
+        pool = SessionPool(pool_maxsize=1)
+        for _ in range(5):
+            response = pool.get(fake_api.url, headers={
+                'Authorization': 'OAuth token'
+            })
+            assert response.status_code == 200
+        stats = pool.stats()
+        pool.close()
+
+        assert stats['requests'] == 5
+        assert stats['connections'] == 1, (
+            'Проверьте, что соединение с сервером переиспользуется'
+        )
+        assert stats['reused'] == 4
+
+    def test_mocked_requests_get_is_used(self, monkeypatch):
+        calls = []
+
+        def mock_get(url, **kwargs):
+            calls.append(url)
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        SessionPool().get('http://example.com')
+
+        assert calls == ['http://example.com'], (
+            'Проверьте, что подменённый requests.get вызывается'
+        )
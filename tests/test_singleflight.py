@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from homework_bot.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+
+    def run_together(self, flights, key, func, callers=5):
+        results = []
+        errors = []
+
+        def call():
+            try:
+                results.append(flights.do(key, func))
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_concurrent_calls_are_merged(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return 'answer'
+
+        threads, results, _ = self.run_together(flights, 'key', fetch)
+        while flights.stats()['merged'] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert calls == [1]
+        assert results == ['answer'] * 5
+        assert flights.stats() == {'calls': 1, 'merged': 4}
+
+    def test_error_is_shared_and_not_cached(self):
+        flights = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise ConnectionError('down')
+
+        threads, _, errors = self.run_together(flights, 'key', fail, 3)
+        while flights.stats()['merged'] < 2:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 3
+        assert all(isinstance(error, ConnectionError) for error in errors)
+        assert flights.do('key', lambda: 'again') == 'again'
+
+    def test_different_keys_are_not_merged(self):
+        flights = SingleFlight()
+
+        assert flights.do(('token', 1), lambda: 1) == 1
+        assert flights.do(('token', 2), lambda: 2) == 2
+        with pytest.raises(ValueError):
+            flights.do('key', int, 'x')
+        assert flights.stats() == {'calls': 3, 'merged': 0}
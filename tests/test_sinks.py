@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+
+import pytest
+
+import homework
+from benchmarks.fakes import FakeTelegramServer
+from homework_bot import metrics, sinks
+from homework_bot.sinks import Dispatcher, JsonlSink, Sink, WebhookSink
+from homework_bot.tenants import Tenant, TenantState
+
+
+class RecordingSink(Sink):
+
+    name = 'recording'
+
+    def __init__(self, release=None):
+        super().__init__()
+        self.release = release
+        self.texts = []
+
+    def send(self, notification):
+        if self.release is not None:
+            self.release.wait(5)
+        self.texts.append(notification['text'])
+
+
+@pytest.fixture
+def telegram_server():
+    server = FakeTelegramServer().start()
+    yield server
+    server.stop()
+
+
+class TestDispatcher:
+
+    def test_slow_sink_does_not_delay_others(self):
+        release = threading.Event()
+        slow, fast = RecordingSink(release), RecordingSink()
+        dispatcher = Dispatcher([slow, fast], workers=2)
+        started = time.monotonic()
+        dispatcher.dispatch('first')
+        dispatcher.dispatch('second')
+
+        assert time.monotonic() - started < 0.1, (
+            'Проверьте, что отправка в приёмники не задерживает опрос'
+        )
+        deadline = time.monotonic() + 5
+        while fast.texts != ['first', 'second']:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert slow.texts == []
+        release.set()
+        dispatcher.close()
+        assert slow.texts == ['first', 'second']
+
+    def test_lagging_sink_drops_oldest(self):
+        release = threading.Event()
+        slow = RecordingSink(release)
+        dispatcher = Dispatcher([slow], workers=1, max_pending=2)
+        for text in ('1', '2', '3', '4'):
+            dispatcher.dispatch(text)
+        release.set()
+        dispatcher.close()
+
+        assert slow.texts[-2:] == ['3', '4']
+        assert len(slow.texts) < 4, (
+            'Проверьте, что отстающий приёмник не копит уведомления без предела'
+        )
+
+    def test_failing_sink_is_counted(self):
+        class BrokenSink(Sink):
+            name = 'broken'
+
+            def send(self, notification):
+                raise OSError('disk is full')
+
+        dispatcher = Dispatcher([BrokenSink()])
+        dispatcher.dispatch('text')
+        dispatcher.close()
+
+        assert metrics.SINK_FAILURES.value(
+            sink='broken', error='OSError'
+        ) == 1
+
+
+class TestSinks:
+
+    def test_webhook_sink(self, telegram_server):
+        sink = WebhookSink(f'{telegram_server.base_url}/hook')
+        sink.send({'text': 'text', 'chat_ids': [1], 'time': 0})
+
+        assert telegram_server.messages == 1
+
+    def test_slow_webhook_times_out(self):
+        server = FakeTelegramServer(latency=1).start()
+        try:
+            sink = WebhookSink(f'{server.base_url}/hook', timeout=0.2)
+            started = time.monotonic()
+            with pytest.raises(TimeoutError):
+                sink.send({'text': 'text', 'chat_ids': [], 'time': 0})
+            assert time.monotonic() - started < 0.9
+        finally:
+            server.stop()
+
+    def test_jsonl_sink(self, tmp_path):
+        path = tmp_path / 'notifications.jsonl'
+        sink = JsonlSink(str(path))
+        sink.send({'text': 'первое', 'chat_ids': [1], 'time': 0})
+        sink.send({'text': 'второе', 'chat_ids': [1], 'time': 0})
+
+        lines = path.read_text(encoding='utf-8').splitlines()
+        assert [json.loads(line)['text'] for line in lines] == [
+            'первое', 'второе'
+        ]
+
+
+def test_broadcast_reaches_chats_and_sinks(monkeypatch, fake_bot):
+    sink = RecordingSink()
+    monkeypatch.setattr(sinks, '_dispatcher', Dispatcher([sink]))
+    monkeypatch.setattr(sinks, 'NOTIFY_CHAT_IDS', ['team', 1])
+
+    homework.broadcast(fake_bot, (1, 2), 'text')
+    sinks.close()
+
+    assert fake_bot.messages == [(1, 'text'), (2, 'text'), ('team', 'text')]
+    assert sink.texts == ['text']
+
+
+def test_errors_are_not_broadcast(monkeypatch, fake_bot):
+    sink = RecordingSink()
+    monkeypatch.setattr(sinks, '_dispatcher', Dispatcher([sink]))
+    monkeypatch.setattr(sinks, 'NOTIFY_CHAT_IDS', ['team'])
+
+    def fail(*args):
+        raise ConnectionError('down')
+
+    monkeypatch.setattr(homework, 'fetch_homeworks', fail)
+    assert not homework.poll_tenant(
+        fake_bot, Tenant('token', 1), TenantState(from_date=0)
+    )
+    sinks.close()
+
+    assert [chat_id for chat_id, _ in fake_bot.messages] == [1], (
+        'Проверьте, что ошибки аккаунта не уходят в общие чаты и приёмники'
+    )
+    assert sink.texts == []
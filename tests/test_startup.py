@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT_DIR = dirname(dirname(abspath(__file__)))
+STARTUP_THRESHOLD_US = int(os.getenv('STARTUP_THRESHOLD_US', 50000))
+HEAVY_MODULES = ('telegram', 'requests', 'dotenv')
+
+
+def import_homework(code=''):
+    return subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import homework{code}'],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def cumulative_import_time(stderr, module):
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        if name.strip() == module:
+            return int(cumulative)
+    raise AssertionError(f'{module} is not found in -X importtime output')
+
+
+class TestStartup:
+
+    def test_import_is_fast(self):
+        best = min(
+            cumulative_import_time(import_homework().stderr, 'homework')
+            for _ in range(3)
+        )
+        assert best < STARTUP_THRESHOLD_US, (
+            f'Импорт homework занимает {best} мкс, '
+            f'порог {STARTUP_THRESHOLD_US} мкс'
+        )
+
+    def test_heavy_modules_are_lazy(self):
+        code = (
+            '; import sys; '
+            f'print([m for m in {HEAVY_MODULES!r} if m in sys.modules])'
+        )
+        assert import_homework(code).stdout.strip() == '[]', (
+            'Проверьте, что telegram, requests и dotenv '
+            'не импортируются вместе с homework'
+        )
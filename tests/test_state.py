@@ -0,0 +1,72 @@
+import time
+
+from homework_bot.state import NotificationState
+
+
+class TestNotificationState:
+    KEY = NotificationState.make_key('tenant', 123, 'approved')
+
+    def test_key_is_remembered(self):
+        state = NotificationState()
+        assert self.KEY not in state
+        state.add(self.KEY)
+
+        assert self.KEY in state, (
+            'Проверьте, что отправленный статус запоминается'
+        )
+        assert NotificationState.make_key(
+            'tenant', 123, 'rejected'
+        ) not in state
+
+    def test_memory_is_capped(self):
+        state = NotificationState(max_entries=3)
+        for homework_id in range(10):
+            state.add(NotificationState.make_key('t', homework_id, 'ok'))
+
+        assert len(state) == 3, (
+            'Проверьте, что число хранимых статусов ограничено'
+        )
+        assert NotificationState.make_key('t', 0, 'ok') not in state
+        assert NotificationState.make_key('t', 9, 'ok') in state
+
+    def test_least_recently_used_is_evicted(self):
+        state = NotificationState(max_entries=2)
+        first = NotificationState.make_key('t', 1, 'ok')
+        state.add(first)
+        state.add(NotificationState.make_key('t', 2, 'ok'))
+        assert first in state
+        state.add(NotificationState.make_key('t', 3, 'ok'))
+
+        assert first in state
+        assert NotificationState.make_key('t', 2, 'ok') not in state
+
+    def test_entries_expire(self, monkeypatch):
+        state = NotificationState(ttl=10)
+        state.add(self.KEY)
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now + 11)
+
+        assert self.KEY not in state, (
+            'Проверьте, что устаревшие статусы забываются'
+        )
+
+    def test_state_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        state = NotificationState(path=path)
+        state.add(self.KEY)
+        state.close()
+
+        assert self.KEY in NotificationState(path=path), (
+            'Проверьте, что состояние сохраняется в SQLite'
+        )
+
+    def test_only_last_status_is_kept(self):
+        state = NotificationState()
+        reviewing = NotificationState.make_key('t', 1, 'reviewing')
+        state.add(reviewing)
+        state.add(NotificationState.make_key('t', 1, 'rejected'))
+
+        assert reviewing not in state, (
+            'Проверьте, что сравнивается последний известный статус работы'
+        )
+        assert len(state) == 1
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from homework_bot.cursor import SqliteCursorStore
+from homework_bot.engine import PollingEngine
+from homework_bot.scheduling import FixedSchedule
+from homework_bot.supervisor import (Coordinator, HashRing, ShardWorker,
+                                     Supervisor)
+from homework_bot.tenants import Tenant
+
+KEYS = [f'tenant{number}' for number in range(2000)]
+
+
+def idle_worker(worker_id, tenants_path, workers):
+    Coordinator(tenants_path).heartbeat(worker_id)
+    time.sleep(60)
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    coordinator = Coordinator(str(tmp_path / 'shards.db'))
+    yield coordinator
+    coordinator.close()
+
+
+class TestHashRing:
+
+    def test_keys_are_spread_evenly(self):
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        owners = [ring.node_for(key) for key in KEYS]
+
+        for node in 'abcd':
+            assert 300 < owners.count(node) < 700
+
+    def test_new_node_takes_only_its_share(self):
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        before = {key: ring.node_for(key) for key in KEYS}
+        ring.add('e')
+        moved = [key for key in KEYS if ring.node_for(key) != before[key]]
+
+        assert len(moved) < len(KEYS) * 0.35
+        assert {ring.node_for(key) for key in moved} == {'e'}
+        ring.remove('e')
+        assert {key: ring.node_for(key) for key in KEYS} == before
+
+    def test_empty_ring(self):
+        assert HashRing().node_for('key') is None
+
+
+class TestShardWorker:
+
+    def make_worker(self, worker_id, coordinator, tenants, bot, url):
+        engine = PollingEngine(
+            bot, [], endpoint=url, schedule=FixedSchedule(0, 0)
+        )
+        coordinator.heartbeat(worker_id)
+        return ShardWorker(worker_id, coordinator, engine, tenants)
+
+    def test_workers_split_and_take_over(self, coordinator, fake_api,
+                                         fake_bot):
+        tenants = [Tenant(f'token{number}', number) for number in range(40)]
+        first, second = (
+            self.make_worker(worker_id, coordinator, tenants, fake_bot,
+                             fake_api.url)
+            for worker_id in ('worker-0', 'worker-1')
+        )
+        first_shard = first.rebalance()
+        second_shard = second.rebalance()
+
+        assert first_shard and second_shard
+        assert set(first_shard) | set(second_shard) == set(tenants)
+        assert not set(first_shard) & set(second_shard)
+
+        report = asyncio.run(first.engine.run_cycle())
+        assert report.polled == len(first_shard)
+
+        coordinator.remove('worker-1')
+        assert first.rebalance() == tenants
+
+    def test_stale_heartbeat_is_not_live(self, tmp_path):
+        coordinator = Coordinator(str(tmp_path / 'shards.db'), timeout=0.1)
+        coordinator.heartbeat('worker-0')
+        assert coordinator.live_workers() == ['worker-0']
+        time.sleep(0.2)
+        assert coordinator.live_workers() == []
+
+
+class TestSqliteCursorStore:
+
+    def test_cursor_is_shared_and_moves_forward(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        first, second = SqliteCursorStore(path), SqliteCursorStore(path)
+
+        assert first.advance('token', 100)
+        first.save()
+        assert second.load('token', 0) == 100
+        assert not second.advance('token', 50)
+        assert not second.advance('token', '200')
+        assert second.advance('token', 200)
+        second.save()
+        assert first.load('token', 0) == 200
+        first.close()
+        second.close()
+
+
+class TestSupervisor:
+
+    def test_dead_worker_is_restarted(self, coordinator):
+        supervisor = Supervisor(
+            coordinator.path, 2, coordinator=coordinator, target=idle_worker
+        ).start()
+        try:
+            deadline = time.monotonic() + 30
+            while len(coordinator.live_workers()) < 2:
+                assert time.monotonic() < deadline
+                time.sleep(0.1)
+            victim = supervisor.processes['worker-1']
+            os.kill(victim.pid, signal.SIGKILL)
+            victim.join()
+
+            assert supervisor.check() == ['worker-1']
+            assert supervisor.restarts == 1
+            assert supervisor.processes['worker-1'].is_alive()
+            assert supervisor.check() == []
+        finally:
+            supervisor.stop()
+
+        assert not victim.is_alive()
+        assert coordinator.live_workers() == []
+
+    def test_scale(self, coordinator):
+        supervisor = Supervisor(
+            coordinator.path, 1, coordinator=coordinator, target=idle_worker
+        ).start()
+        try:
+            supervisor.scale(3)
+            assert sorted(supervisor.processes) == [
+                'worker-0', 'worker-1', 'worker-2'
+            ]
+            supervisor.scale(1)
+            assert list(supervisor.processes) == ['worker-0']
+        finally:
+            supervisor.stop()